@@ -1,17 +1,14 @@
 import pygame
-import sys
 import math
+import json
+import time
 import random
+import argparse
 import numpy as np
 from pygame.locals import *
 
-# 初始化 Pygame
-pygame.init()
-
-# 设置窗口
+# 窗口大小（窗口在 main() 中创建，导入本模块不会初始化 SDL）
 WIDTH, HEIGHT = 800, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("嵌套旋转六边形中的弹跳球")
 
 # 颜色定义
 BLACK = (0, 0, 0)
@@ -37,7 +34,9 @@ class Parameters:
         self.ball_count = 5
 
 params = Parameters()
-clock = pygame.time.Clock()
+
+# 所有随机数都来自这个生成器，设定种子后每次运行完全一致
+rng = random.Random()
 
 # 六边形类
 class Hexagon:
@@ -46,16 +45,34 @@ class Hexagon:
         self.size = size
         self.rotation_speed = rotation_speed
         self.angle = 0
-        self.missing_wall = missing_wall if missing_wall is not None else random.randint(0, 5)
+        self.missing_wall = missing_wall if missing_wall is not None else rng.randint(0, 5)
+        
+        # 几何缓存：每次 update() 只计算一次，写入预分配的数组
+        self.vertices = np.empty((6, 2))
+        self.lengths = np.empty(6)
+        self.units = np.empty((6, 2))     # 边的单位向量 (vertices[i + 1] - vertices[i]) / lengths[i]
+        self.wall_indices = [i for i in range(6) if i != self.missing_wall]
+        self._offsets = np.empty((6, 2))  # 顶点相对中心的偏移
+        self._rotated = np.empty((6, 2))
+        self._step = np.empty((2, 2))     # 每帧旋转矩阵（转置）
+        self._step_speed = None
+        self._sync_geometry()
+    
+    def _sync_geometry(self):
+        # 由角度重新计算顶点偏移，消除增量旋转的累积误差
+        angles = np.radians(self.angle + np.arange(6) * 60)
+        self._offsets[:, 0] = self.size * np.cos(angles)
+        self._offsets[:, 1] = self.size * np.sin(angles)
+        self._refresh_geometry()
+    
+    def _refresh_geometry(self):
+        np.add(self._offsets, self.center, out=self.vertices)
+        np.subtract(np.roll(self.vertices, -1, axis=0), self.vertices, out=self.units)
+        np.hypot(self.units[:, 0], self.units[:, 1], out=self.lengths)
+        self.units /= self.lengths[:, None]
         
     def get_vertices(self):
-        vertices = []
-        for i in range(6):
-            angle = math.radians(self.angle + i * 60)
-            x = self.center[0] + self.size * math.cos(angle)
-            y = self.center[1] + self.size * math.sin(angle)
-            vertices.append((x, y))
-        return vertices
+        return [tuple(vertex) for vertex in self.vertices.tolist()]
     
     def get_walls(self):
         vertices = self.get_vertices()
@@ -67,8 +84,20 @@ class Hexagon:
     
     def update(self):
         self.angle += self.rotation_speed
-        if self.angle >= 360:
-            self.angle -= 360
+        if self.angle >= 360 or self.angle < 0:
+            self.angle %= 360
+            self._sync_geometry()
+            return
+        
+        # 增量旋转缓存的顶点偏移，避免每个顶点都调用三角函数
+        if self._step_speed != self.rotation_speed:
+            theta = math.radians(self.rotation_speed)
+            cos_t, sin_t = math.cos(theta), math.sin(theta)
+            self._step[:] = ((cos_t, sin_t), (-sin_t, cos_t))
+            self._step_speed = self.rotation_speed
+        np.matmul(self._offsets, self._step, out=self._rotated)
+        self._offsets, self._rotated = self._rotated, self._offsets
+        self._refresh_geometry()
     
     def draw(self, surface):
         walls = self.get_walls()
@@ -79,7 +108,7 @@ class Hexagon:
 class Ball:
     def __init__(self, pos, radius, color):
         self.pos = np.array(pos, dtype=float)
-        self.vel = np.array([random.uniform(-1, 1), random.uniform(-1, 1)], dtype=float)
+        self.vel = np.array([rng.uniform(-1, 1), rng.uniform(-1, 1)], dtype=float)
         self.radius = radius
         self.color = color
         self.angular_momentum = 0
@@ -96,9 +125,8 @@ class Ball:
         
         # 墙壁碰撞检测
         for hexagon in hexagons:
-            walls = hexagon.get_walls()
-            for wall in walls:
-                self.check_wall_collision(wall, hexagon)
+            for i in hexagon.wall_indices:
+                self.check_wall_collision(i, hexagon)
                 
         # 限制在屏幕范围内
         if self.pos[0] < self.radius:
@@ -115,14 +143,14 @@ class Ball:
             self.pos[1] = HEIGHT - self.radius
             self.vel[1] *= -1
     
-    def check_wall_collision(self, wall, hexagon):
-        p1 = np.array(wall[0])
-        p2 = np.array(wall[1])
+    def check_wall_collision(self, i, hexagon):
+        # 直接读取六边形在本帧缓存的几何数据
+        p1 = hexagon.vertices[i]
+        p2 = hexagon.vertices[(i + 1) % 6]
         
         # 线段向量
-        seg_vec = p2 - p1
-        seg_len = np.linalg.norm(seg_vec)
-        unit_vec = seg_vec / seg_len
+        seg_len = hexagon.lengths[i]
+        unit_vec = hexagon.units[i]
         
         # 球到线段起点的向量
         ball_to_p1 = self.pos - p1
@@ -188,6 +216,33 @@ class Ball:
         pygame.draw.circle(surface, self.color, pos_int, self.radius)
         pygame.draw.circle(surface, WHITE, pos_int, self.radius, 1)
 
+# 预渲染的球图像：每种（颜色、半径）只画一次填充和白色描边，之后每帧直接贴图
+class BallSprites:
+    def __init__(self):
+        self.images = {}
+
+    def get(self, color, radius):
+        key = (tuple(color), radius)
+        image = self.images.get(key)
+        if image is None:
+            # 透明色选一个与填充色、描边色都不同的颜色
+            colorkey = next(c for c in ((0, 0, 0), (1, 1, 1)) if c != key[0] and c != WHITE)
+            image = pygame.Surface((2 * radius, 2 * radius))
+            image.fill(colorkey)
+            # 与 Ball.draw 中两次 pygame.draw.circle 的像素完全一致
+            pygame.draw.circle(image, color, (radius, radius), radius)
+            pygame.draw.circle(image, WHITE, (radius, radius), radius, 1)
+            image = image.convert()
+            image.set_colorkey(colorkey, RLEACCEL)
+            self.images[key] = image
+        return image
+
+# 用一次 Surface.blits 调用画出所有球
+def draw_balls(surface, sprites, balls):
+    surface.blits([(sprites.get(ball.color, ball.radius),
+                    (int(ball.pos[0]) - ball.radius, int(ball.pos[1]) - ball.radius))
+                   for ball in balls])
+
 # 创建嵌套六边形
 def create_hexagons(params):
     hexagons = []
@@ -198,7 +253,7 @@ def create_hexagons(params):
         speed = params.rotation_speeds[i % len(params.rotation_speeds)]
         
         # 最外层六边形没有缺口
-        missing_wall = None if i == 0 else random.randint(0, 5)
+        missing_wall = None if i == 0 else rng.randint(0, 5)
         
         hexagon = Hexagon(center, size, speed, missing_wall)
         hexagons.append(hexagon)
@@ -212,8 +267,8 @@ def create_balls(params, innermost_hexagon):
     radius = innermost_hexagon.size * 0.5
     
     for i in range(params.ball_count):
-        angle = random.uniform(0, 2 * math.pi)
-        distance = random.uniform(0, radius)
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(0, radius)
         pos = (
             center[0] + distance * math.cos(angle),
             center[1] + distance * math.sin(angle)
@@ -223,34 +278,110 @@ def create_balls(params, innermost_hexagon):
     
     return balls
 
+# 输入录制与回放：记录每个按键发生在第几帧，回放时在同一帧注入同样的按键
+class InputRecorder:
+    def __init__(self, seed):
+        self.seed = seed
+        self.frames = 0  # 录制的总帧数
+        self.events = []  # [帧号, 按键] 列表
+        self._by_frame = {}
+    
+    def record(self, frame, key):
+        self.events.append([frame, key])
+    
+    def keys_for(self, frame):
+        return self._by_frame.get(frame, [])
+    
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"seed": self.seed, "frames": self.frames, "events": self.events}, f)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        recorder = cls(data["seed"])
+        recorder.frames = data["frames"]
+        recorder.events = data["events"]
+        for frame, key in recorder.events:
+            recorder._by_frame.setdefault(frame, []).append(key)
+        return recorder
+
+# 处理一个按键，返回是否继续运行
+def handle_key(key, params):
+    if key == K_ESCAPE:
+        return False
+    # 调整参数
+    elif key == K_UP:
+        params.gravity += 0.05
+    elif key == K_DOWN:
+        params.gravity = max(0, params.gravity - 0.05)
+    elif key == K_RIGHT:
+        for i in range(len(params.rotation_speeds)):
+            params.rotation_speeds[i] *= 1.1
+    elif key == K_LEFT:
+        for i in range(len(params.rotation_speeds)):
+            params.rotation_speeds[i] *= 0.9
+    return True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="嵌套旋转六边形中的弹跳球")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--no-sprites", dest="sprites", action="store_false",
+                        help="每个球用 Ball.draw 逐个画圆，不使用预渲染贴图（用于对比）")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="把按键事件录制到文件")
+    group.add_argument("--replay", metavar="FILE", help="回放录制的按键事件（使用录制时的种子）")
+    return parser.parse_args(argv)
+
 # 主循环
-def main():
+def main(argv=None):
+    launch_time = time.perf_counter()
+    args = parse_args(argv)
+    replay = InputRecorder.load(args.replay) if args.replay else None
+    if replay is not None:
+        seed = replay.seed
+    elif args.seed is not None or args.record:
+        # 录制时总是使用确定的种子，保证回放可以复现
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    else:
+        seed = None
+    rng.seed(seed)
+    recorder = InputRecorder(seed) if args.record else None
+    
+    # 只初始化用到的子系统：显示和字体（不初始化音频、手柄）
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("嵌套旋转六边形中的弹跳球")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 30)
+    sprites = BallSprites() if args.sprites else None
+    
     # 创建嵌套六边形（从外到内）
     hexagons = create_hexagons(params)
     
     # 创建球（初始在最内层六边形内）
     balls = create_balls(params, hexagons[-1])
     
+    frame = 0
+    start_time = time.perf_counter()
     running = True
     while running:
+        keys = []
         for event in pygame.event.get():
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    running = False
-                # 调整参数
-                elif event.key == K_UP:
-                    params.gravity += 0.05
-                elif event.key == K_DOWN:
-                    params.gravity = max(0, params.gravity - 0.05)
-                elif event.key == K_RIGHT:
-                    for i in range(len(params.rotation_speeds)):
-                        params.rotation_speeds[i] *= 1.1
-                elif event.key == K_LEFT:
-                    for i in range(len(params.rotation_speeds)):
-                        params.rotation_speeds[i] *= 0.9
+                running = False
+            elif event.type == KEYDOWN and replay is None:
+                keys.append(event.key)
+        if replay is not None:
+            keys = replay.keys_for(frame)
+        
+        for key in keys:
+            if recorder is not None:
+                recorder.record(frame, key)
+            if not handle_key(key, params):
+                running = False
         
         # 清空屏幕
         screen.fill(BLACK)
@@ -263,10 +394,13 @@ def main():
         # 更新并绘制球
         for ball in balls:
             ball.update(hexagons, params)
-            ball.draw(screen)
+        if sprites is not None:
+            draw_balls(screen, sprites, balls)
+        else:
+            for ball in balls:
+                ball.draw(screen)
         
         # 显示参数
-        font = pygame.font.Font(None, 30)
         text_surface = font.render(f"重力: {params.gravity:.2f} | 摩擦: {params.friction:.2f} | 旋转速度: {params.rotation_speeds[0]:.2f}", True, WHITE)
         text_rect = text_surface.get_rect(topleft=(10, 10))
         screen.blit(text_surface, text_rect)
@@ -277,7 +411,20 @@ def main():
         
         # 更新显示
         pygame.display.flip()
+        if frame == 0:
+            print(f"首帧耗时 {(time.perf_counter() - launch_time) * 1000:.1f} 毫秒")
         clock.tick(60)
+        
+        frame += 1
+        if replay is not None and frame >= replay.frames:
+            running = False
+    
+    elapsed = time.perf_counter() - start_time
+    if recorder is not None:
+        recorder.frames = frame
+        recorder.save(args.record)
+    if replay is not None or recorder is not None:
+        print(f"种子 {seed}: {frame} 帧, {elapsed:.2f} 秒 ({frame / elapsed:.1f} 帧/秒)")
     
     pygame.quit()
 
@@ -1,6 +1,7 @@
 import pygame
 import math
 import random
+import numpy as np
 from pygame.locals import *
 
 # 可调参数
@@ -10,9 +11,54 @@ SETTINGS = {
     "ball_radius": 8,
     "hex_sizes": [400, 300, 200, 100],  # 从外到内的六边形尺寸
     "rotation_speeds": [0.3, -0.5, 0.7, -0.4],  # 各层旋转速度
-    "colors": [(255,50,50), (50,255,50), (50,50,255), (255,255,50), (50,255,255)]
+    "colors": [(255,50,50), (50,255,50), (50,50,255), (255,255,50), (50,255,255)],
+    "trail_length": 21,  # 轨迹保留的点数
+    "trail_mode": "lines",  # "lines"：每帧重画整条轨迹；"fade"：在累积图层上只画最新一段，整体逐帧变暗
 }
 
+class TrailBuffer:
+    """固定长度的环形缓冲区，保存最近的轨迹点，添加新点是 O(1)"""
+    def __init__(self, length):
+        self.points = np.empty((length, 2))
+        self.head = 0  # 下一个写入位置
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, pos):
+        self.points[self.head] = pos
+        self.head = (self.head + 1) % len(self.points)
+        self.count = min(self.count + 1, len(self.points))
+
+    def last(self, n):
+        """按时间顺序返回最近的 n 个点"""
+        n = min(n, self.count)
+        indices = (self.head - n + np.arange(n)) % len(self.points)
+        return self.points[indices]
+
+    def ordered(self):
+        return self.last(self.count)
+
+class FadingTrails:
+    """累积轨迹图层：每帧整体变暗一次，再画上每个球最新的一段，
+    开销与轨迹长度无关。按 trail_length 帧线性衰减到黑色"""
+    def __init__(self, size, length):
+        self.surface = pygame.Surface(size)
+        self.surface.fill((0, 0, 0))
+        # 用减法而不是半透明覆盖来变暗，暗部不会因为取整而残留；
+        # 从一张纯色图层减法贴图比带 special_flags 的 fill 快得多
+        step = math.ceil(255 / length)
+        self.fade = pygame.Surface(size)
+        self.fade.fill((step, step, step))
+
+    def update(self, balls):
+        self.surface.blit(self.fade, (0, 0), special_flags=BLEND_RGB_SUB)
+        for b in balls:
+            if len(b.trail) >= 2:
+                start, end = b.trail.last(2)
+                pygame.draw.line(self.surface, b.color, start, end, 3)
+
 class Hexagon:
     def __init__(self, size, rot_speed, level):
         self.size = size
@@ -40,16 +86,14 @@ class Ball:
         self.pos = [0, 0]
         self.vel = [random.uniform(-3,3), random.uniform(-3,3)]
         self.color = color
-        self.trail = []
+        self.trail = TrailBuffer(SETTINGS["trail_length"])
         
     def apply_physics(self):
         self.vel[1] += SETTINGS["gravity"]
         self.vel = [v * SETTINGS["friction"] for v in self.vel]
         self.pos = [self.pos[0]+self.vel[0], self.pos[1]+self.vel[1]]
         
-        if len(self.trail) > 20:
-            self.trail.pop(0)
-        self.trail.append(tuple(self.pos))
+        self.trail.append(self.pos)
         
     def check_collision(self, hexagons, screen_rect):
         # 边界碰撞
@@ -87,10 +131,16 @@ def main():
     balls = [Ball(SETTINGS["colors"][i]) for i in range(5)]
     for b in balls:
         b.pos = [400, 300]
+    fading = SETTINGS["trail_mode"] == "fade"
+    trails = FadingTrails(screen.get_size(), SETTINGS["trail_length"]) if fading else None
     
     running = True
     while running:
-        screen.fill((0,0,0))
+        if fading:
+            # 累积图层直接覆盖整个屏幕，代替清屏
+            screen.blit(trails.surface, (0, 0))
+        else:
+            screen.fill((0,0,0))
         
         for event in pygame.event.get():
             if event.type == QUIT:
@@ -112,9 +162,12 @@ def main():
             b.check_collision(hexagons, screen.get_rect())
             
             # 绘制轨迹
-            if len(b.trail) >= 2:
-                pygame.draw.lines(screen, b.color, False, b.trail, 3)
+            if not fading and len(b.trail) >= 2:
+                pygame.draw.lines(screen, b.color, False, b.trail.ordered(), 3)
             pygame.draw.circle(screen, b.color, [int(b.pos[0]), int(b.pos[1])], SETTINGS["ball_radius"])
+        if fading:
+            # 新的一段出现在下一帧的背景里
+            trails.update(balls)
         
         pygame.display.flip()
         clock.tick(60)
@@ -1,3 +1,5 @@
+import argparse
+import time
 import pygame
 import pymunk
 import math
@@ -5,10 +7,16 @@ import random
 import numpy as np
 from typing import List, Tuple
 
+try:
+    import pymunk.batch as pymunk_batch
+except ImportError:  # pymunk without the batch API
+    pymunk_batch = None
+
 # Initialize Pygame and Pymunk
 pygame.init()
+GRAVITY = (0, 981)  # Gravity in pixels/s^2
 space = pymunk.Space()
-space.gravity = (0, 981)  # Gravity in pixels/s^2
+space.gravity = GRAVITY
 
 # Constants
 SCREEN_WIDTH = 800
@@ -28,46 +36,155 @@ class RotatingHexagon:
     def __init__(self, center: Tuple[float, float], radius: float, rotation_speed: float, missing_wall: int = None):
         self.center = center
         self.radius = radius
-        self.rotation_speed = rotation_speed
-        self.angle = 0
+        self.rotation_speed = rotation_speed  # radians per frame
         self.missing_wall = missing_wall
         self.lines = []
+        
+        # The walls hang off one kinematic body that pymunk turns itself, so
+        # the segments are created once and push balls with the wall's velocity
+        self.body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
+        self.body.position = center
+        self.body.angular_velocity = rotation_speed * FPS  # radians per second
+        space.add(self.body)
         self.create_hexagon()
     
+    @property
+    def angle(self) -> float:
+        return self.body.angle
+    
     def create_hexagon(self):
-        # Clear existing lines
-        for line in self.lines:
-            if line in space.shapes:
-                space.remove(line)
-        self.lines.clear()
-        
-        # Create new hexagon walls
+        # Hexagon walls in the body's local coordinates
         for i in range(6):
             if i == self.missing_wall:
                 continue
                 
-            angle1 = math.pi / 3 * i + self.angle
-            angle2 = math.pi / 3 * (i + 1) + self.angle
+            angle1 = math.pi / 3 * i
+            angle2 = math.pi / 3 * (i + 1)
             
-            x1 = self.center[0] + self.radius * math.cos(angle1)
-            y1 = self.center[1] + self.radius * math.sin(angle1)
-            x2 = self.center[0] + self.radius * math.cos(angle2)
-            y2 = self.center[1] + self.radius * math.sin(angle2)
+            x1 = self.radius * math.cos(angle1)
+            y1 = self.radius * math.sin(angle1)
+            x2 = self.radius * math.cos(angle2)
+            y2 = self.radius * math.sin(angle2)
             
-            shape = pymunk.Segment(space.static_body, (x1, y1), (x2, y2), 2)
+            shape = pymunk.Segment(self.body, (x1, y1), (x2, y2), 2)
             shape.friction = FRICTION
             shape.elasticity = ELASTICITY
             space.add(shape)
             self.lines.append(shape)
     
-    def update(self):
-        self.angle += self.rotation_speed
-        self.create_hexagon()
-    
     def draw(self, screen):
         for line in self.lines:
             pygame.draw.line(screen, (255, 255, 255), 
-                           line.a, line.b, 2)
+                           self.body.local_to_world(line.a), self.body.local_to_world(line.b), 2)
+
+def configure_space(num_balls: int, spatial_hash: bool = False, iterations: int = 10,
+                    threads: int = 1) -> pymunk.Space:
+    """Replace the global space with a fresh one using the given solver options.
+    
+    The spatial hash cell is one ball diameter, so each ball overlaps at most
+    four cells. threads > 1 uses pymunk's threaded solver (at most 2 threads,
+    ignored on Windows).
+    """
+    global space
+    space = pymunk.Space(threaded=threads > 1)
+    if threads > 1:
+        space.threads = threads
+    space.gravity = GRAVITY
+    space.iterations = iterations
+    if spatial_hash:
+        space.use_spatial_hash(2 * BALL_RADIUS, max(num_balls, 1) * 4)
+    return space
+
+def clear_space():
+    # Empty the space while the interpreter is still fully alive; freeing a
+    # populated space during shutdown makes pymunk's callbacks complain
+    space.remove(*space.shapes, *space.bodies)
+
+class BodyPositions:
+    """Reads every ball position out of the space into one reusable (N, 2) array.
+    
+    With pymunk's batch API all bodies are copied in a single C call and
+    scattered into ball order by body id; otherwise it falls back to reading
+    body.position ball by ball.
+    """
+    
+    def __init__(self, balls: List["Ball"]):
+        self.balls = balls
+        self.positions = np.zeros((len(balls), 2))
+        if pymunk_batch is not None:
+            ids = np.array([ball.body.id for ball in balls], dtype=np.uint64)
+            self._order = np.argsort(ids)
+            self._sorted_ids = ids[self._order]
+            self._buffer = pymunk_batch.Buffer()
+            self._fields = pymunk_batch.BodyFields.BODY_ID | pymunk_batch.BodyFields.POSITION
+    
+    def read(self) -> np.ndarray:
+        if pymunk_batch is None:
+            for i, ball in enumerate(self.balls):
+                self.positions[i] = ball.body.position
+            return self.positions
+        
+        self._buffer.clear()
+        pymunk_batch.get_space_bodies(space, self._fields, self._buffer)
+        ids = np.frombuffer(self._buffer.int_buf(), dtype=np.uint64)
+        coordinates = np.frombuffer(self._buffer.float_buf(), dtype=np.float64).reshape(-1, 2)
+        # The space also holds the hexagon bodies; keep only the balls
+        slot = np.minimum(np.searchsorted(self._sorted_ids, ids), len(self._sorted_ids) - 1)
+        is_ball = self._sorted_ids[slot] == ids
+        self.positions[self._order[slot[is_ball]]] = coordinates[is_ball]
+        return self.positions
+
+def draw_balls(screen, balls: List["Ball"], readout: BodyPositions):
+    # Draw every ball from the bulk position readout instead of per-ball Vec2d access
+    for ball, center in zip(balls, readout.read().astype(np.int64).tolist()):
+        pygame.draw.circle(screen, ball.color, center, ball.radius)
+
+def create_hexagons(center: Tuple[float, float], num_hexagons: int = 3) -> List[RotatingHexagon]:
+    hexagons = []
+    for i in range(num_hexagons):
+        radius = 100 * (i + 1)
+        rotation_speed = 0.02 * (num_hexagons - i)  # Outer hexagons rotate slower
+        missing_wall = random.randint(0, 5) if i < num_hexagons - 1 else None
+        hexagon = RotatingHexagon(center, radius, rotation_speed, missing_wall)
+        hexagons.append(hexagon)
+    return hexagons
+
+def spawn_positions(center: Tuple[float, float], count: int,
+                    hexagons: List[RotatingHexagon]) -> List[Tuple[float, float]]:
+    """Starting positions for count balls.
+    
+    A handful of balls start near the center as before. Larger populations
+    are packed on a grid inside the outer hexagon, skipping any spot that
+    touches a wall, so thousands of balls can start without overlapping.
+    """
+    if count <= len(BALL_COLORS):
+        return [(center[0] + random.randint(-30, 30), center[1] + random.randint(-30, 30))
+                for _ in range(count)]
+    
+    walls = [(line.a, line.b) for hexagon in hexagons for line in hexagon.lines]
+    clearance = BALL_RADIUS + 3
+    spacing = 2 * BALL_RADIUS + 1
+    limit = max(hexagon.radius for hexagon in hexagons) * math.cos(math.pi / 6) - clearance
+    steps = int(limit // spacing)
+    positions = []
+    # Fill from the bottom up so the pile starts close to rest
+    for row in range(steps, -steps - 1, -1):
+        for column in range(-steps, steps + 1):
+            x, y = column * spacing, row * spacing
+            if math.hypot(x, y) > limit:
+                continue
+            if any(point_segment_distance((x, y), a, b) < clearance for a, b in walls):
+                continue
+            positions.append((center[0] + x, center[1] + y))
+            if len(positions) == count:
+                return positions
+    raise ValueError(f"only {len(positions)} balls of radius {BALL_RADIUS} fit in the hexagons")
+
+def point_segment_distance(point, a, b) -> float:
+    px, py = point[0] - a[0], point[1] - a[1]
+    ex, ey = b[0] - a[0], b[1] - a[1]
+    t = max(0.0, min(1.0, (px * ex + py * ey) / (ex * ex + ey * ey)))
+    return math.hypot(px - t * ex, py - t * ey)
 
 class Ball:
     def __init__(self, pos: Tuple[float, float], color: Tuple[int, int, int]):
@@ -87,25 +204,83 @@ class Ball:
         pygame.draw.circle(screen, self.color, 
                          (int(pos.x), int(pos.y)), self.radius)
 
-def main():
+def build_scene(num_balls: int, spatial_hash: bool = False, iterations: int = 10, threads: int = 1):
+    configure_space(num_balls, spatial_hash, iterations, threads)
+    
     # Create nested hexagons
     center = (SCREEN_WIDTH//2, SCREEN_HEIGHT//2)
-    hexagons = []
-    num_hexagons = 3
-    for i in range(num_hexagons):
-        radius = 100 * (i + 1)
-        rotation_speed = 0.02 * (num_hexagons - i)  # Outer hexagons rotate slower
-        missing_wall = random.randint(0, 5) if i < num_hexagons - 1 else None
-        hexagon = RotatingHexagon(center, radius, rotation_speed, missing_wall)
-        hexagons.append(hexagon)
+    hexagons = create_hexagons(center)
     
     # Create balls
-    balls = []
-    for i in range(5):
-        pos = (center[0] + random.randint(-30, 30), 
-               center[1] + random.randint(-30, 30))
-        ball = Ball(pos, BALL_COLORS[i])
-        balls.append(ball)
+    balls = [Ball(pos, BALL_COLORS[i % len(BALL_COLORS)])
+             for i, pos in enumerate(spawn_positions(center, num_balls, hexagons))]
+    return hexagons, balls
+
+def step_space(substeps: int = 1):
+    # One frame of physics split into equal substeps
+    dt = 1 / FPS / substeps
+    for _ in range(substeps):
+        space.step(dt)
+
+def benchmark(args):
+    """Time space stepping for every combination of the listed options."""
+    print(f"{'balls':>6} {'hash':>5} {'iters':>5} {'substeps':>8} {'threads':>7} "
+          f"{'mean ms':>8} {'p99 ms':>7} {'frames/s':>9}")
+    for iterations in args.iterations:
+        for substeps in args.substeps:
+            for threads in args.threads:
+                random.seed(args.seed)
+                build_scene(args.balls, args.spatial_hash, iterations, threads)
+                times = []
+                for _ in range(args.benchmark):
+                    start = time.perf_counter()
+                    step_space(substeps)
+                    times.append(time.perf_counter() - start)
+                times = np.array(times) * 1000
+                print(f"{args.balls:>6} {str(args.spatial_hash):>5} {iterations:>5} {substeps:>8} {threads:>7} "
+                      f"{times.mean():>8.3f} {np.percentile(times, 99):>7.3f} {1000 / times.mean():>9.1f}",
+                      flush=True)
+
+def parse_args(argv=None):
+    def int_list(text):
+        return [int(value) for value in text.split(",")]
+    
+    parser = argparse.ArgumentParser(description="Rotating hexagons with bouncing balls (pymunk)")
+    parser.add_argument("--balls", type=int, default=5, help="number of balls")
+    parser.add_argument("--radius", type=int, default=BALL_RADIUS,
+                        help="ball radius; smaller balls let thousands fit in the hexagons")
+    parser.add_argument("--spatial-hash", action="store_true",
+                        help="use pymunk's spatial hash (cell = one ball diameter) instead of the default tree")
+    parser.add_argument("--iterations", type=int_list, default=[10], help="solver iterations")
+    parser.add_argument("--substeps", type=int_list, default=[1], help="physics substeps per frame")
+    parser.add_argument("--threads", type=int_list, default=[1], help="solver threads (1 or 2)")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="FRAMES",
+                        help="time FRAMES frames of stepping without drawing for every combination of "
+                             "the comma-separated --iterations, --substeps and --threads values")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the hexagon gaps")
+    args = parser.parse_args(argv)
+    if args.balls < 0 or args.radius < 1 or min(args.iterations + args.substeps + args.threads) < 1:
+        parser.error("--balls must not be negative; --radius, --iterations, --substeps and --threads at least 1")
+    if not args.benchmark and max(len(args.iterations), len(args.substeps), len(args.threads)) > 1:
+        parser.error("several --iterations/--substeps/--threads values need --benchmark")
+    return args
+
+def main(argv=None):
+    global BALL_RADIUS
+    args = parse_args(argv)
+    BALL_RADIUS = args.radius
+    if args.benchmark:
+        benchmark(args)
+        clear_space()
+        pygame.quit()
+        return
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    substeps = args.substeps[0]
+    hexagons, balls = build_scene(args.balls, args.spatial_hash, args.iterations[0], args.threads[0])
+    readout = BodyPositions(balls)
+    step_times = []
     
     running = True
     while running:
@@ -116,23 +291,25 @@ def main():
                 if event.key == pygame.K_ESCAPE:
                     running = False
         
-        # Update physics
-        space.step(1/FPS)
-        
-        # Update hexagons
-        for hexagon in hexagons:
-            hexagon.update()
+        # Update physics (this also turns the kinematic hexagon bodies)
+        start = time.perf_counter()
+        step_space(substeps)
+        step_times.append(time.perf_counter() - start)
+        if len(step_times) == FPS:
+            pygame.display.set_caption(f"Rotating Hexagons with Bouncing Balls - {len(balls)} balls, "
+                                       f"step {1000 * sum(step_times) / len(step_times):.2f} ms")
+            step_times.clear()
         
         # Draw
         screen.fill((0, 0, 0))
         for hexagon in hexagons:
             hexagon.draw(screen)
-        for ball in balls:
-            ball.draw(screen)
+        draw_balls(screen, balls, readout)
         
         pygame.display.flip()
         clock.tick(FPS)
 
+    clear_space()
     pygame.quit()
 
 if __name__ == "__main__":
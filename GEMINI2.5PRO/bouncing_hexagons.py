@@ -1,6 +1,8 @@
 import pygame
 import math
 import random
+import time
+from collections import OrderedDict
 
 # --- Adjustable Parameters ---
 SCREEN_WIDTH = 800
@@ -17,14 +19,11 @@ ROTATION_SPEEDS = [0.005, -0.003, 0.001] # Radians per frame for each layer (out
 COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255)]
 BACKGROUND_COLOR = (0, 0, 0)
 HEXAGON_COLOR = (255, 255, 255)
+HEX_SPRITE_ANGLES = 0 # Opt-in: cached rotation steps per full turn (e.g. 360) when drawing lines is the bottleneck; 0 draws lines every frame
+HEX_SPRITE_CACHE_MB = 128 # Memory cap for the cached hexagon images
 # ---------------------------
 
-# --- Pygame Setup ---
-pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Bouncing Balls in Rotating Hexagons")
-clock = pygame.time.Clock()
-# --------------------
+SECTOR_ANGLE = math.pi / 3 # Angle spanned by each hexagon wall
 
 # --- Helper Functions ---
 def rotate_point(point, angle, center):
@@ -204,12 +203,36 @@ class Hexagon:
         self.rotation_angle += self.rotation_speed
         self.vertices = get_hexagon_vertices(self.center_x, self.center_y, self.radius, self.rotation_angle)
 
+    def get_sector(self, x, y):
+        """Finds the wall whose 60° sector (in the rotating frame) contains a point.
+
+        Returns the wall index and the point's offset along that wall from its
+        midpoint, positive towards vertex index + 1.
+        """
+        dx = x - self.center_x
+        dy = y - self.center_y
+        local_angle = (math.atan2(dy, dx) - self.rotation_angle) % (2 * math.pi)
+        index = int(local_angle // SECTOR_ANGLE) % 6
+        mid_angle = (index + 0.5) * SECTOR_ANGLE + self.rotation_angle
+        along = -dx * math.sin(mid_angle) + dy * math.cos(mid_angle)
+        return index, along
+
     def check_collision(self, ball):
         """Checks collision between the ball and the hexagon walls."""
         min_dist_to_wall = float('inf')
         closest_wall_data = None
 
-        for i in range(6):
+        # The wall of the ball's sector is always the closest one. Past the
+        # end of that wall the closest point is a vertex, shared with the
+        # neighbouring wall, so test both in index order to keep tie-breaking.
+        index, along = self.get_sector(ball.x, ball.y)
+        if abs(along) < self.radius / 2:
+            candidates = (index,)
+        else:
+            neighbour = (index + (1 if along > 0 else -1)) % 6
+            candidates = (min(index, neighbour), max(index, neighbour))
+
+        for i in candidates:
             start_point = self.vertices[i]
             end_point = self.vertices[(i + 1) % 6]
 
@@ -232,52 +255,180 @@ class Hexagon:
                 start_point = self.vertices[i]
                 end_point = self.vertices[(i + 1) % 6]
                 pygame.draw.line(surface, HEXAGON_COLOR, start_point, end_point, self.thickness)
+
+class HexagonSpriteCache:
+    """Pre-rendered hexagon images at quantised rotation angles.
+
+    Each image holds one hexagon (with its gap) drawn at one of `steps`
+    evenly spaced angles; drawing blits the image nearest the hexagon's
+    current angle instead of rasterising its walls. Images are rendered on
+    first use.
+
+    A spinning hexagon visits every angle in turn, which defeats a plain
+    least-recently-used cache once a full turn no longer fits. So each
+    hexagon shape is admitted only if a full turn of its images fits in
+    `max_bytes` (smallest shapes first); the others keep drawing lines.
+    Least recently used images are evicted if the cache still grows past
+    the cap.
+    """
+
+    def __init__(self, steps=HEX_SPRITE_ANGLES, max_bytes=HEX_SPRITE_CACHE_MB * 2**20):
+        self.steps = steps
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.bytes = 0
+        self.shapes = {} # (radius, thickness, missing wall) -> admitted?
+        self.reserved = 0 # Bytes a full turn of every admitted shape takes
+        self.hits = 0
+        self.misses = 0
+
+    def shape_key(self, hexagon):
+        return (hexagon.radius, hexagon.thickness, hexagon.missing_wall_index)
+
+    def admit(self, hexagon):
+        """Decides once per shape whether its images are cached."""
+        key = self.shape_key(hexagon)
+        if key not in self.shapes:
+            images = self.steps // 6 if self.closed_symmetry(hexagon) else self.steps
+            side = 2 * self.half_size(hexagon)
+            need = images * side * side * pygame.display.get_surface().get_bytesize()
+            self.shapes[key] = self.reserved + need <= self.max_bytes
+            if self.shapes[key]:
+                self.reserved += need
+        return self.shapes[key]
+
+    def closed_symmetry(self, hexagon):
+        # A closed hexagon looks the same every 60 degrees
+        return hexagon.missing_wall_index < 0 and self.steps % 6 == 0
+
+    def half_size(self, hexagon):
+        return math.ceil(hexagon.radius + hexagon.thickness)
+
+    def get(self, hexagon):
+        """Returns the cached image nearest the hexagon's current angle."""
+        step = round(hexagon.rotation_angle % (2 * math.pi) / (2 * math.pi) * self.steps) % self.steps
+        if self.closed_symmetry(hexagon):
+            step %= self.steps // 6
+        key = (*self.shape_key(hexagon), step)
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            image = self.render(hexagon, step * 2 * math.pi / self.steps)
+            self.images[key] = image
+            self.bytes += image.get_width() * image.get_height() * image.get_bytesize()
+            while self.bytes > self.max_bytes and len(self.images) > 1:
+                _, evicted = self.images.popitem(last=False)
+                self.bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+        else:
+            self.hits += 1
+            self.images.move_to_end(key)
+        return image
+
+    def render(self, hexagon, angle):
+        half = self.half_size(hexagon)
+        # Created in the display's pixel format, so no convert() is needed
+        image = pygame.Surface((2 * half, 2 * half))
+        image.fill(BACKGROUND_COLOR)
+        vertices = get_hexagon_vertices(half, half, hexagon.radius, angle)
+        for i in range(6):
+            if i != hexagon.missing_wall_index:
+                pygame.draw.line(image, HEXAGON_COLOR, vertices[i], vertices[(i + 1) % 6], hexagon.thickness)
+        # The background is transparent so nested hexagons show through
+        image.set_colorkey(BACKGROUND_COLOR, pygame.RLEACCEL)
+        return image
+
+    def draw(self, surface, hexagons):
+        """Draws the hexagons in order: cached ones with one blits call, the rest with lines."""
+        for hexagon in sorted(hexagons, key=lambda h: h.radius):
+            self.admit(hexagon)
+        blits = []
+        for hexagon in hexagons:
+            if not self.shapes[self.shape_key(hexagon)]:
+                # Keep the drawing order: flush the pending blits first
+                if blits:
+                    surface.blits(blits, doreturn=False)
+                    blits = []
+                hexagon.draw(surface)
+                continue
+            image = self.get(hexagon)
+            half = image.get_width() // 2
+            blits.append((image, (round(hexagon.center_x) - half, round(hexagon.center_y) - half)))
+        if blits:
+            surface.blits(blits, doreturn=False)
 # -------------
 
 # --- Game Objects ---
-center_x, center_y = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
-hexagons = []
-for i in range(HEXAGON_LAYERS):
-    radius = INITIAL_HEX_RADIUS + i * HEX_RADIUS_STEP
-    speed = ROTATION_SPEEDS[i % len(ROTATION_SPEEDS)] # Cycle through speeds if fewer provided
-    is_outer = (i == HEXAGON_LAYERS - 1)
-    hexagons.append(Hexagon(center_x, center_y, radius, speed, HEX_THICKNESS, is_outermost=is_outer))
-
-balls = []
-# Start balls near the center of the innermost hexagon
-innermost_radius = INITIAL_HEX_RADIUS / 2
-for i in range(NUM_BALLS):
-    angle = random.uniform(0, 2 * math.pi)
-    dist = random.uniform(0, innermost_radius)
-    start_x = center_x + dist * math.cos(angle)
-    start_y = center_y + dist * math.sin(angle)
-    balls.append(Ball(start_x, start_y, BALL_RADIUS, COLORS[i % len(COLORS)]))
+def create_hexagons(center_x, center_y):
+    """Creates the hexagon layers, innermost first; only the outermost is closed."""
+    hexagons = []
+    for i in range(HEXAGON_LAYERS):
+        radius = INITIAL_HEX_RADIUS + i * HEX_RADIUS_STEP
+        speed = ROTATION_SPEEDS[i % len(ROTATION_SPEEDS)] # Cycle through speeds if fewer provided
+        is_outer = (i == HEXAGON_LAYERS - 1)
+        hexagons.append(Hexagon(center_x, center_y, radius, speed, HEX_THICKNESS, is_outermost=is_outer))
+    return hexagons
+
+def create_balls(center_x, center_y):
+    """Creates NUM_BALLS balls near the center of the innermost hexagon."""
+    balls = []
+    innermost_radius = INITIAL_HEX_RADIUS / 2
+    for i in range(NUM_BALLS):
+        angle = random.uniform(0, 2 * math.pi)
+        dist = random.uniform(0, innermost_radius)
+        start_x = center_x + dist * math.cos(angle)
+        start_y = center_y + dist * math.sin(angle)
+        balls.append(Ball(start_x, start_y, BALL_RADIUS, COLORS[i % len(COLORS)]))
+    return balls
 # ------------------
 
 # --- Game Loop ---
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # --- Updates ---
-    for hexagon in hexagons:
-        hexagon.update_vertices()
-    for ball in balls:
-        ball.update(hexagons) # Pass all hexagons for collision checks
-    # ---------------
-
-    # --- Drawing ---
-    screen.fill(BACKGROUND_COLOR)
-    for hexagon in hexagons:
-        hexagon.draw(screen)
-    for ball in balls:
-        ball.draw(screen)
-    # ---------------
-
-    pygame.display.flip()
-    clock.tick(60) # Limit frame rate
-
-pygame.quit()
-# -----------------
\ No newline at end of file
+def main():
+    launch_time = time.perf_counter()
+
+    # Only the display is used; audio, joystick and font stay uninitialised
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Bouncing Balls in Rotating Hexagons")
+    clock = pygame.time.Clock()
+    sprites = HexagonSpriteCache() if HEX_SPRITE_ANGLES else None
+
+    center_x, center_y = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+    hexagons = create_hexagons(center_x, center_y)
+    balls = create_balls(center_x, center_y)
+
+    first_frame = True
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        # --- Updates ---
+        for hexagon in hexagons:
+            hexagon.update_vertices()
+        for ball in balls:
+            ball.update(hexagons) # Pass all hexagons for collision checks
+        # ---------------
+
+        # --- Drawing ---
+        screen.fill(BACKGROUND_COLOR)
+        if sprites:
+            sprites.draw(screen, hexagons)
+        else:
+            for hexagon in hexagons:
+                hexagon.draw(screen)
+        for ball in balls:
+            ball.draw(screen)
+        # ---------------
+
+        pygame.display.flip()
+        if first_frame:
+            print(f"First frame after {(time.perf_counter() - launch_time) * 1000:.1f} ms")
+            first_frame = False
+        clock.tick(60) # Limit frame rate
+
+    pygame.quit()
+# -----------------
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import sys
 import math
 import random
+import bisect
+import argparse
+import cProfile
+import pstats
 import pygame
 
 # 可调参数
@@ -30,26 +34,14 @@ BALL_COLORS = [
     (255, 0, 255)
 ]
 
+# 正六边形内切圆半径 = 外接圆半径 * cos30°
+COS30 = math.cos(math.radians(30))
+
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Nested Rotating Hexagons with Bouncing Balls")
 clock = pygame.time.Clock()
 
-# 辅助函数：计算点到线段的距离及最近点
-def line_point_distance(p, a, b):
-    ax, ay = a
-    bx, by = b
-    px, py = p
-    vx = bx - ax
-    vy = by - ay
-    mag = vx*vx + vy*vy
-    if mag == 0:
-        return math.hypot(px-ax, py-ay), a
-    u = ((px-ax)*vx + (py-ay)*vy) / mag
-    u = max(0, min(1, u))
-    closest = (ax + u*vx, ay + u*vy)
-    return math.hypot(px-closest[0], py-closest[1]), closest
-
 # 六边形类
 class Hexagon:
     def __init__(self, center, radius, rot_speed, missing_edge=None):
@@ -58,19 +50,64 @@ class Hexagon:
         self.angle = 0  # 当前旋转角度，单位度
         self.rot_speed = rot_speed
         self.missing_edge = missing_edge  # None 表示无缺失
+        # 几何缓存：每次 update() 只更新一次，之后碰撞检测直接读取
+        self.vertices = [[0.0, 0.0] for _ in range(6)]
+        self.edges = [[0.0, 0.0] for _ in range(6)]    # 边向量 vertices[i+1] - vertices[i]
+        self.normals = [[0.0, 0.0] for _ in range(6)]  # 单位法向量 (-ly, lx) / length
+        self.lengths = [0.0] * 6
+        self.edge_indices = [i for i in range(6) if i != missing_edge]
+        self._offsets = [[0.0, 0.0] for _ in range(6)]  # 顶点相对中心的偏移
+        self._step_speed = None
+        self._step = (1.0, 0.0)  # 每帧旋转的 (cos, sin)
+        self._sync_geometry()
 
-    def update(self):
-        self.angle = (self.angle + self.rot_speed) % 360
+    def _sync_geometry(self):
+        # 由角度重新计算顶点偏移，消除增量旋转的累积误差
+        for i in range(6):
+            theta = math.radians(self.angle + i * 60)
+            self._offsets[i][0] = self.radius * math.cos(theta)
+            self._offsets[i][1] = self.radius * math.sin(theta)
+        self._refresh_geometry()
 
-    def get_vertices(self):
+    def _refresh_geometry(self):
         cx, cy = self.center
-        vertices = []
         for i in range(6):
-            theta = math.radians(self.angle + i * 60)
-            x = cx + self.radius * math.cos(theta)
-            y = cy + self.radius * math.sin(theta)
-            vertices.append((x, y))
-        return vertices
+            vertex = self.vertices[i]
+            vertex[0] = cx + self._offsets[i][0]
+            vertex[1] = cy + self._offsets[i][1]
+        for i in range(6):
+            a = self.vertices[i]
+            b = self.vertices[(i+1)%6]
+            lx = b[0] - a[0]
+            ly = b[1] - a[1]
+            length = math.hypot(lx, ly)
+            self.edges[i][0] = lx
+            self.edges[i][1] = ly
+            self.lengths[i] = length
+            self.normals[i][0] = -ly / length
+            self.normals[i][1] = lx / length
+
+    def update(self):
+        angle = self.angle + self.rot_speed
+        self.angle = angle % 360
+        if angle != self.angle:
+            # 角度回绕时重新同步
+            self._sync_geometry()
+            return
+        # 增量旋转缓存的顶点偏移
+        if self._step_speed != self.rot_speed:
+            theta = math.radians(self.rot_speed)
+            self._step = (math.cos(theta), math.sin(theta))
+            self._step_speed = self.rot_speed
+        cos_t, sin_t = self._step
+        for offset in self._offsets:
+            x, y = offset
+            offset[0] = x * cos_t - y * sin_t
+            offset[1] = x * sin_t + y * cos_t
+        self._refresh_geometry()
+
+    def get_vertices(self):
+        return [tuple(vertex) for vertex in self.vertices]
 
     def draw(self, surface):
         vertices = self.get_vertices()
@@ -102,34 +139,46 @@ class Ball:
     def draw(self, surface):
         pygame.draw.circle(surface, self.color, (int(self.pos[0]), int(self.pos[1])), self.radius)
 
-    def collide_with_line(self, a, b):
-        # 检测小球与线段 a->b 的碰撞
-        dist, closest = line_point_distance(self.pos, a, b)
+    def collide_with_edge(self, hexagon, i):
+        # 检测小球与第 i 条边的碰撞，直接使用六边形缓存的边数据
+        ax, ay = hexagon.vertices[i]
+        vx, vy = hexagon.edges[i]
+        length = hexagon.lengths[i]
+        if length == 0:
+            return
+        px = self.pos[0] - ax
+        py = self.pos[1] - ay
+        u = (px*vx + py*vy) / (length * length)
+        u = max(0, min(1, u))
+        dist = math.hypot(px - u*vx, py - u*vy)
         if dist < self.radius:
-            # 计算法向量
-            ax, ay = a
-            bx, by = b
-            lx = bx - ax
-            ly = by - ay
-            # 法向量（垂直于线段）
-            nx = -ly
-            ny = lx
-            norm = math.hypot(nx, ny)
-            if norm == 0:
-                return
-            nx /= norm
-            ny /= norm
-
-            # 碰撞反弹: 如果小球正朝向墙体运动，则反弹
+            nx, ny = hexagon.normals[i]
             dot = self.vel[0]*nx + self.vel[1]*ny
             if dot < 0:
                 self.vel[0] -= 2 * dot * nx
                 self.vel[1] -= 2 * dot * ny
-                # 将小球移动到碰撞边缘以防穿透
                 overlap = self.radius - dist
                 self.pos[0] += nx * overlap
                 self.pos[1] += ny * overlap
 
+
+# 径向分层剔除：所有六边形共用一个中心，边上的点到中心的距离都落在
+# [内切圆半径, 外接圆半径] 之间，因此小球只可能碰到距离区间覆盖其中心距离的那几层
+class RingIndex:
+    def __init__(self, hexagons):
+        self.center = hexagons[0].center
+        # 按外接圆半径升序排列，便于二分查找
+        self.layers = sorted(hexagons, key=lambda h: h.radius)
+        self.radii = [h.radius for h in self.layers]
+
+    def candidates(self, ball):
+        # 返回小球可能接触到的六边形（从外到内，与原遍历顺序一致）
+        dist = math.hypot(ball.pos[0] - self.center[0], ball.pos[1] - self.center[1])
+        # 需要满足 dist - r <= 外接圆半径 且 dist + r >= 内切圆半径
+        lo = bisect.bisect_left(self.radii, dist - ball.radius)
+        hi = bisect.bisect_right(self.radii, (dist + ball.radius) / COS30)
+        return self.layers[lo:hi][::-1]
+
 # 创建多个六边形（最外层无缺失，其余每个随机缺失一个边）
 def create_hexagons():
     center = (WIDTH/2, HEIGHT/2)
@@ -157,13 +206,41 @@ def create_balls(inner_hex):
         balls.append(Ball(pos, vel, color))
     return balls
 
-def main():
+PROFILE_TOP = 25  # --profile 报告中列出的函数数量
+
+def write_profile_report(profile, path, top=PROFILE_TOP):
+    """按函数自身耗时排序打印最热的函数，并把原始统计数据保存到 path"""
+    profile.dump_stats(path)
+    stats = pstats.Stats(profile).strip_dirs().sort_stats(pstats.SortKey.TIME)
+    stats.print_stats(top)
+    print(f"统计数据已写入 {path}（可用 python -m pstats {path} 查看）")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="嵌套旋转六边形中的弹跳球")
+    parser.add_argument("--profile", action="store_true",
+                        help="在 cProfile 下不限帧率运行 --frames 帧，并报告最耗时的函数")
+    parser.add_argument("--frames", type=int, default=600, help="--profile 时运行的帧数")
+    parser.add_argument("--profile-output", default="simulation.prof", metavar="FILE",
+                        help="--profile 写出的统计文件")
+    args = parser.parse_args(argv)
+    if args.frames < 1:
+        parser.error("--frames 必须至少为 1")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     hexagons = create_hexagons()
     balls = create_balls(hexagons[-1])
+    rings = RingIndex(hexagons)
     
+    # 分析模式下取消帧率限制，运行固定帧数
+    profile = cProfile.Profile() if args.profile else None
+    if profile:
+        profile.enable()
+    frame = 0
     running = True
     while running:
-        dt = clock.tick(FPS)
+        dt = clock.tick(0 if profile else FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
@@ -175,16 +252,11 @@ def main():
         # 更新小球位置
         for ball in balls:
             ball.update()
-            # 对每个六边形的各条边进行碰撞检测
-            for hexagon in hexagons:
-                vertices = hexagon.get_vertices()
-                for i in range(6):
-                    # 如果该边缺失则跳过
-                    if hexagon.missing_edge is not None and i == hexagon.missing_edge:
-                        continue
-                    a = vertices[i]
-                    b = vertices[(i+1)%6]
-                    ball.collide_with_line(a, b)
+            # 只对小球可能接触到的六边形的各条边进行碰撞检测
+            for hexagon in rings.candidates(ball):
+                # 缺失的边不在 edge_indices 中
+                for i in hexagon.edge_indices:
+                    ball.collide_with_edge(hexagon, i)
 
         screen.fill(BG_COLOR)
         # 绘制六边形（从外到内绘制，保证内层在上面）
@@ -195,7 +267,13 @@ def main():
             ball.draw(screen)
 
         pygame.display.flip()
+        frame += 1
+        if profile and frame >= args.frames:
+            running = False
 
+    if profile:
+        profile.disable()
+        write_profile_report(profile, args.profile_output)
     pygame.quit()
     sys.exit()
 
@@ -7,29 +7,61 @@ Each hexagon rotates at a different speed and has one missing wall (except the o
 Physics includes gravity, friction, and realistic collisions.
 """
 
+import argparse
+import cProfile
+import csv
+import os
+import pstats
 import pygame
 import sys
 import math
+import time
 import random
 import numpy as np
+from collections import namedtuple
 from pygame.locals import *
 
-# Initialize pygame
-pygame.init()
-
 # Configuration parameters (adjustable)
 WIDTH, HEIGHT = 800, 800
 CENTER = (WIDTH // 2, HEIGHT // 2)
-FPS = 60
+FPS = 60  # Render frame cap
+
+# Fixed-timestep physics (independent of the render rate)
+PHYSICS_HZ = 60
+PHYSICS_DT = 1.0 / PHYSICS_HZ
+MAX_STEPS_PER_FRAME = 5  # Catch-up cap; older backlog is dropped
 
-# Physics parameters (adjustable)
-GRAVITY = 0.2
-FRICTION = 0.99
+# Physics parameters (adjustable, per second)
+GRAVITY = 720.0        # px/s^2
+FRICTION = 0.547       # Fraction of velocity kept after one second
 ELASTICITY = 0.8
+WALL_KICK = 30.0       # px/s added along the wall on contact (rotating-wall push)
+ROTATION_SPEED_RANGE = (12.0, 60.0)  # degrees per second
 BALL_RADIUS = 10
+# px beyond contact a candidate pair may be and still reach the in-order
+# narrow phase, where an earlier response in the same pass can push it together
+PAIR_MARGIN = BALL_RADIUS
 NUM_BALLS = 5
 NUM_HEXAGONS = 3
 
+# Sleeping: balls that stay put stop being integrated until something wakes them
+SLEEP_DISTANCE = 2.0   # px a resting ball may jitter around without counting as moving
+SLEEP_STEPS = 30       # Consecutive resting physics steps before a ball sleeps
+SLEEP_SLOP = 1.0       # px a wall may press into a sleeping ball before waking it
+SLEEP_WAKE_SPEED = 60.0  # px/s an awake ball must close at to wake a sleeping one it hits
+
+# Frame profiler: per-phase timings over a rolling window of frames
+PROFILE_PHASES = ("events", "hexagons", "integrate", "walls", "pairs", "boundary", "sleep",
+                  "draw", "overlay", "flip")
+PROFILE_WINDOW = 300   # Frames kept in the ring buffer
+PROFILE_REFRESH = 15   # Frames between overlay text updates
+PROFILE_TOP = 25       # Functions listed in the --profile report
+
+# Dirty-rectangle rendering: above this fraction of the screen, push the whole frame
+DIRTY_FULL_FRACTION = 0.5
+DIRTY_PIECE = 40       # px; long walls are tracked as pieces so their rects stay tight
+WALL_WIDTH = 2
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -42,28 +74,47 @@ BALL_COLORS = [
     (255, 0, 255),  # Magenta
 ]
 
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Bouncing Balls in Rotating Hexagons")
-clock = pygame.time.Clock()
-
 
 class Hexagon:
     def __init__(self, center, size, rotation_speed, missing_wall=None):
         self.center = center
         self.size = size
-        self.rotation_speed = rotation_speed  # degrees per frame
+        self.rotation_speed = rotation_speed  # degrees per second
         self.angle = 0
+        self.previous_angle = 0  # Angle before the last update, for interpolation
+        self.last_step = 0.0     # Degrees turned by the last update
         self.missing_wall = missing_wall  # Index of the missing wall (0-5)
         
+        # Geometry cache, refreshed once per update() into these arrays
+        self.vertices = np.empty((6, 2))
+        self.edges = np.empty((6, 2))     # vertices[i + 1] - vertices[i]
+        self.lengths = np.empty(6)
+        self.units = np.empty((6, 2))     # edges / lengths
+        self.normals = np.empty((6, 2))   # units rotated by -90 degrees
+        self.wall_indices = np.array([i for i in range(6) if i != missing_wall])
+        self._offsets = np.empty((6, 2))  # vertices relative to center
+        self._rotated = np.empty((6, 2))
+        self._step = np.empty((2, 2))     # per-update rotation matrix (transposed)
+        self._step_speed = None
+        self._sync_geometry()
+        
+    def _sync_geometry(self):
+        # Recompute vertex offsets from the angle, discarding rotation drift
+        angles = np.radians(self.angle + np.arange(6) * 60)
+        self._offsets[:, 0] = self.size * np.cos(angles)
+        self._offsets[:, 1] = self.size * np.sin(angles)
+        self._refresh_geometry()
+    
+    def _refresh_geometry(self):
+        np.add(self._offsets, self.center, out=self.vertices)
+        np.subtract(np.roll(self.vertices, -1, axis=0), self.vertices, out=self.edges)
+        np.hypot(self.edges[:, 0], self.edges[:, 1], out=self.lengths)
+        np.divide(self.edges, self.lengths[:, None], out=self.units)
+        self.normals[:, 0] = self.units[:, 1]
+        self.normals[:, 1] = -self.units[:, 0]
+    
     def get_vertices(self):
-        vertices = []
-        for i in range(6):
-            angle_rad = math.radians(self.angle + i * 60)
-            x = self.center[0] + self.size * math.cos(angle_rad)
-            y = self.center[1] + self.size * math.sin(angle_rad)
-            vertices.append((x, y))
-        return vertices
+        return [tuple(vertex) for vertex in self.vertices.tolist()]
     
     def get_walls(self):
         vertices = self.get_vertices()
@@ -73,15 +124,109 @@ class Hexagon:
                 walls.append((vertices[i], vertices[(i+1) % 6]))
         return walls
     
-    def update(self):
-        self.angle += self.rotation_speed
-        if self.angle >= 360:
-            self.angle -= 360
+    def update(self, dt=PHYSICS_DT):
+        step = self.rotation_speed * dt
+        self.previous_angle = self.angle
+        self.last_step = step
+        self.angle += step
+        if self.angle >= 360 or self.angle < 0:
+            self.angle %= 360
+            self._sync_geometry()
+            return
+        
+        # Rotate the cached offsets incrementally instead of calling trig per vertex
+        if self._step_speed != step:
+            theta = math.radians(step)
+            cos_t, sin_t = math.cos(theta), math.sin(theta)
+            self._step[:] = ((cos_t, sin_t), (-sin_t, cos_t))
+            self._step_speed = step
+        np.matmul(self._offsets, self._step, out=self._rotated)
+        self._offsets, self._rotated = self._rotated, self._offsets
+        self._refresh_geometry()
     
-    def draw(self, surface):
-        walls = self.get_walls()
+    def draw(self, surface, alpha=1.0, collect_rects=False):
+        if alpha == 1.0:
+            walls = self.get_walls()
+        else:
+            # Interpolate between the last two physics states
+            angle = self.previous_angle + alpha * self.last_step
+            vertices = []
+            for i in range(6):
+                angle_rad = math.radians(angle + i * 60)
+                vertices.append((self.center[0] + self.size * math.cos(angle_rad),
+                                 self.center[1] + self.size * math.sin(angle_rad)))
+            walls = [(vertices[i], vertices[(i+1) % 6]) for i in range(6) if i != self.missing_wall]
+        # With collect_rects, return the changed area of each wall for
+        # dirty-rectangle rendering
+        rects = []
         for wall in walls:
-            pygame.draw.line(surface, WHITE, wall[0], wall[1], 2)
+            pygame.draw.line(surface, WHITE, wall[0], wall[1], WALL_WIDTH)
+            if collect_rects:
+                rects.extend(line_rects(wall[0], wall[1], WALL_WIDTH))
+        return rects
+
+
+def line_rects(start, end, width, piece=DIRTY_PIECE):
+    """Rects covering a drawn line, one per piece of at most ``piece`` px.
+
+    A single bounding box of a long diagonal wall is mostly empty space;
+    pieces keep the area that dirty-rectangle rendering erases small.
+    """
+    (x0, y0), (x1, y1) = start, end
+    count = max(1, int(math.hypot(x1 - x0, y1 - y0) // piece) + 1)
+    rects = []
+    for i in range(count):
+        ax = x0 + (x1 - x0) * i / count
+        ay = y0 + (y1 - y0) * i / count
+        bx = x0 + (x1 - x0) * (i + 1) / count
+        by = y0 + (y1 - y0) * (i + 1) / count
+        left, top = int(min(ax, bx)) - width, int(min(ay, by)) - width
+        rects.append(pygame.Rect(left, top, int(abs(bx - ax)) + 2 * width + 2, int(abs(by - ay)) + 2 * width + 2))
+    return rects
+
+
+class BallSprites:
+    """Pre-rendered ball images, one colorkeyed Surface per (color, radius, outline).
+
+    Each image holds exactly the pixels pygame.draw.circle would draw for a
+    ball whose integer center is at (radius, radius), so blitting it at
+    ``center - radius`` matches Ball.draw pixel for pixel. Create after the
+    display mode is set so the images are converted to the screen format.
+    """
+
+    KEY_CANDIDATES = ((0, 0, 0), (1, 1, 1), (254, 254, 254))
+
+    def __init__(self):
+        self.images = {}
+
+    def get(self, color, radius, outline=None):
+        key = (tuple(color), radius, outline and tuple(outline))
+        image = self.images.get(key)
+        if image is None:
+            image = self.images[key] = self._render(*key)
+        return image
+
+    def _render(self, color, radius, outline):
+        colorkey = next(c for c in self.KEY_CANDIDATES if c != color and c != outline)
+        image = pygame.Surface((2 * radius, 2 * radius))
+        image.fill(colorkey)
+        pygame.draw.circle(image, color, (radius, radius), radius)
+        if outline:
+            pygame.draw.circle(image, outline, (radius, radius), radius, 1)
+        if pygame.display.get_surface() is not None:
+            image = image.convert()
+        image.set_colorkey(colorkey, RLEACCEL)
+        return image
+
+
+def draw_balls(surface, images, positions, radii):
+    """Blit every ball in one Surface.blits call; returns the drawn rects.
+
+    ``images`` holds each ball's sprite, ``positions`` the (N, 2) centers
+    and ``radii`` the (N,) integer radii.
+    """
+    corners = positions.astype(int) - radii[:, None]
+    return surface.blits(list(zip(images, corners.tolist())))
 
 
 class Ball:
@@ -92,18 +237,20 @@ class Ball:
         self.color = color
         self.mass = radius * 0.1
     
-    def update(self):
+    def update(self, dt=PHYSICS_DT):
         # Apply gravity
-        self.vel[1] += GRAVITY
+        self.vel[1] += GRAVITY * dt
         
         # Apply friction
-        self.vel *= FRICTION
+        self.vel *= FRICTION ** dt
         
         # Update position
-        self.pos += self.vel
+        self.pos += self.vel * dt
     
-    def draw(self, surface):
-        pygame.draw.circle(surface, self.color, (int(self.pos[0]), int(self.pos[1])), self.radius)
+    def draw(self, surface, pos=None):
+        if pos is None:
+            pos = self.pos
+        return pygame.draw.circle(surface, self.color, (int(pos[0]), int(pos[1])), self.radius)
         
     def check_boundary_collision(self):
         # Bounce off screen edges (as a fallback)
@@ -191,16 +338,426 @@ class Ball:
             # Add some angular momentum effect from the rotating wall
             # This simulates the wall "pushing" the ball as it rotates
             tangent = np.array([-collision_normal[1], collision_normal[0]])
-            self.vel += tangent * 0.5  # Adjust this value for more/less effect
+            self.vel += tangent * WALL_KICK
+
+
+class BallSystem:
+    """Structure-of-arrays storage for every ball in the scene.
+
+    Positions and velocities live in shared (N, 2) arrays and each Ball's
+    ``pos``/``vel`` is rebound to a row view, so per-ball methods and the
+    batched collision stage below operate on the same memory.
+
+    With ``sleeping`` enabled, a ball that stays within SLEEP_DISTANCE of
+    one spot for SLEEP_STEPS steps (its net speed over that window is below
+    SLEEP_DISTANCE / SLEEP_STEPS per step, however much it jitters inside a
+    pile) is put to sleep: its velocity is zeroed, it is no
+    longer integrated, and pairs of sleeping balls are skipped by the narrow
+    phase. It wakes when a wall presses into it by more than SLEEP_SLOP or an
+    awake ball hits it faster than SLEEP_WAKE_SPEED; slower balls bounce off
+    it as if it were fixed. Call wake() after changing GRAVITY, FRICTION etc.
+    at runtime.
+    """
+
+    def __init__(self, balls, sleeping=True):
+        self.balls = balls
+        self.pos = np.array([ball.pos for ball in balls], dtype=float).reshape(-1, 2)
+        self.vel = np.array([ball.vel for ball in balls], dtype=float).reshape(-1, 2)
+        self.radius = np.array([ball.radius for ball in balls], dtype=float)
+        self.mass = np.array([ball.mass for ball in balls], dtype=float)
+        self.prev_pos = self.pos.copy()  # Positions before the last update
+        self.wall_hits = 0  # Ball-wall contacts resolved so far
+        self.sleeping = sleeping
+        self.asleep = np.zeros(len(balls), dtype=bool)
+        self.rest_pos = self.pos.copy()  # Where each ball's current resting streak began
+        self.rest_steps = np.zeros(len(balls), dtype=np.int64)
+        for i, ball in enumerate(balls):
+            ball.pos = self.pos[i]
+            ball.vel = self.vel[i]
+
+    def __len__(self):
+        return len(self.balls)
+
+    def update(self, dt=PHYSICS_DT):
+        # Same integration as Ball.update, applied to every ball at once;
+        # sleeping balls have zero velocity and get no gravity, so stay put
+        self.prev_pos[:] = self.pos
+        self.vel[:, 1] += np.where(self.asleep, 0.0, GRAVITY * dt)
+        self.vel *= FRICTION ** dt
+        self.pos += self.vel * dt
+
+    def wake(self, mask=None):
+        """Wake the balls selected by a boolean mask or index array, or every ball."""
+        if mask is None:
+            mask = slice(None)
+        self.asleep[mask] = False
+        self.rest_steps[mask] = 0
+        self.rest_pos[mask] = self.pos[mask]
+
+    def update_sleep(self):
+        # Count consecutive steps spent near one spot and put balls that
+        # stayed there long enough to sleep
+        if not self.sleeping:
+            return
+        drift = self.pos - self.rest_pos
+        moved = np.einsum("ij,ij->i", drift, drift) > SLEEP_DISTANCE * SLEEP_DISTANCE
+        self.rest_pos[moved] = self.pos[moved]
+        self.rest_steps = np.where(moved, 0, self.rest_steps + 1)
+        falling = ~self.asleep & (self.rest_steps >= SLEEP_STEPS)
+        if falling.any():
+            self.asleep |= falling
+            self.vel[falling] = 0.0
+
+    @property
+    def sleeping_count(self):
+        return int(np.count_nonzero(self.asleep))
+
+    def interpolated(self, alpha):
+        # Render positions between the last two physics states
+        return self.prev_pos + alpha * (self.pos - self.prev_pos)
+
+    def check_boundary_collision(self):
+        # Batched version of Ball.check_boundary_collision
+        pos, vel, radius = self.pos, self.vel, self.radius
+        for axis, limit in ((0, WIDTH), (1, HEIGHT)):
+            low = pos[:, axis] - radius < 0
+            high = ~low & (pos[:, axis] + radius > limit)
+            pos[low, axis] = radius[low]
+            pos[high, axis] = limit - radius[high]
+            hit = low | high
+            vel[hit, axis] = -vel[hit, axis] * ELASTICITY
+
+    def check_wall_collisions(self, walls):
+        if not self.asleep.any():
+            self.wall_hits += collide_walls(self.pos, self.vel, self.radius, walls)
+            return
+        # A wall only reaches a sleeping ball once it presses SLEEP_SLOP into it
+        radius = np.where(self.asleep, self.radius - SLEEP_SLOP, self.radius)
+        touched = np.zeros(len(self), dtype=bool)
+        self.wall_hits += collide_walls(self.pos, self.vel, radius, walls, touched)
+        self.wake(touched & self.asleep)
+
+    def check_ball_collisions(self, first, second):
+        # Narrow phase over broad-phase candidate pairs: drop pairs more than
+        # PAIR_MARGIN apart with one array test, then let check_ball_collision
+        # re-test and resolve the rest in order, as the nested loop did
+        delta = self.pos[second] - self.pos[first]
+        reach = self.radius[first] + self.radius[second]
+        distance_sq = np.einsum("ij,ij->i", delta, delta)
+        near = distance_sq < (reach + PAIR_MARGIN) ** 2
+        if self.asleep.any():
+            # Pairs of sleeping balls are skipped; awake-sleeping pairs either
+            # wake the sleeper or treat it as a fixed obstacle
+            first_asleep = self.asleep[first]
+            second_asleep = self.asleep[second]
+            mixed = np.flatnonzero((distance_sq < reach * reach) & (first_asleep ^ second_asleep))
+            near &= ~(first_asleep | second_asleep)
+            if len(mixed):
+                woken = self._collide_sleepers(first[mixed], second[mixed], first_asleep[mixed])
+                near[mixed[woken]] = True
+        balls = self.balls
+        for i, j in zip(first[near].tolist(), second[near].tolist()):
+            balls[i].check_ball_collision(balls[j])
+
+    def _collide_sleepers(self, first, second, first_asleep):
+        # An awake ball closing on a sleeper faster than SLEEP_WAKE_SPEED
+        # wakes it; slower ones are pushed out and bounce off it as off a
+        # wall, so a pile can settle from the bottom up. Returns the mask of
+        # pairs that woke their sleeper.
+        awake = np.where(first_asleep, second, first)
+        sleeper = np.where(first_asleep, first, second)
+        normal = self.pos[sleeper] - self.pos[awake]
+        distance = np.hypot(normal[:, 0], normal[:, 1])
+        normal[distance == 0] = (1.0, 0.0)
+        normal[distance > 0] /= distance[distance > 0, None]
+        closing = np.einsum("ij,ij->i", self.vel[awake], normal)
+        woken = closing > SLEEP_WAKE_SPEED
+        self.wake(sleeper[woken])
+
+        rest = ~woken
+        awake, normal = awake[rest], normal[rest]
+        overlap = self.radius[awake] + self.radius[sleeper[rest]] - distance[rest]
+        np.subtract.at(self.pos, awake, overlap[:, None] * normal)
+        bounce = (1 + ELASTICITY) * np.maximum(closing[rest], 0.0)
+        np.subtract.at(self.vel, awake, bounce[:, None] * normal)
+        return woken
+
+
+class SpatialHash:
+    """Uniform-grid broad phase for ball-ball collisions.
+
+    Balls are bucketed into square cells of ``cell_size`` (one ball diameter
+    plus PAIR_MARGIN by default, so balls within the margin of touching are
+    always in the same or adjacent cells)
+    and only balls in neighbouring cells become candidate pairs. The grid is
+    rebuilt from the position array on every call to ``pairs``.
+    """
+
+    # Half of the 3x3 neighbourhood, so every cell pair is visited once
+    NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, cell_size=2 * BALL_RADIUS + PAIR_MARGIN):
+        self.cell_size = cell_size
+        self.candidate_pairs = 0  # Number of pairs produced by the last call
+
+    def pairs(self, pos):
+        """Return index arrays (first, second) of candidate pairs, first < second.
+
+        Pairs are sorted the same way as the nested ``for i ... for j > i``
+        loop would visit them.
+        """
+        count = len(pos)
+        if count < 2:
+            self.candidate_pairs = 0
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        cells = np.floor(pos / self.cell_size).astype(np.int64)
+        cells -= cells.min(axis=0) - 1  # Leave a margin so offsets never wrap
+        rows = int(cells[:, 1].max()) + 2
+        keys = cells[:, 0] * rows + cells[:, 1]
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        positions = np.arange(count)
+
+        firsts, seconds = [], []
+        for dx, dy in self.NEIGHBOUR_OFFSETS:
+            target = sorted_keys + (dx * rows + dy)
+            if dx == 0 and dy == 0:
+                lo = positions + 1  # Only later balls in the same cell
+            else:
+                lo = np.searchsorted(sorted_keys, target, side="left")
+            hi = np.searchsorted(sorted_keys, target, side="right")
+            counts = np.maximum(hi - lo, 0)
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            starts = np.cumsum(counts) - counts
+            within = np.arange(total) - np.repeat(starts, counts)
+            firsts.append(order[np.repeat(positions, counts)])
+            seconds.append(order[np.repeat(lo, counts) + within])
+
+        if not firsts:
+            self.candidate_pairs = 0
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        a = np.concatenate(firsts)
+        b = np.concatenate(seconds)
+        first = np.minimum(a, b)
+        second = np.maximum(a, b)
+        visit = np.argsort(first * count + second, kind="stable")
+        self.candidate_pairs = len(visit)
+        return first[visit], second[visit]
+
+
+WallGeometry = namedtuple("WallGeometry", ["starts", "ends", "units", "normals", "lengths"])
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a preallocated ring buffer.
+
+    Each frame is one row of ``samples`` (seconds per phase). Call
+    begin_frame(), then lap(phase) after each phase, then end_frame(): the
+    time since the previous lap is added to that phase, so phases repeated
+    within a frame (several physics steps) accumulate. Only the last
+    ``window`` frames are kept.
+    """
+
+    def __init__(self, phases=PROFILE_PHASES, window=PROFILE_WINDOW):
+        self.phases = phases
+        self.columns = {phase: i for i, phase in enumerate(phases)}
+        self.samples = np.zeros((window, len(phases)))
+        self.frames = 0  # Frames completed so far
+        self.row = self.samples[0]
+        self.last = time.perf_counter()
+
+    def begin_frame(self):
+        self.row = self.samples[self.frames % len(self.samples)]
+        self.row[:] = 0.0
+        self.last = time.perf_counter()
+
+    def end_frame(self):
+        self.frames += 1
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.row[self.columns[phase]] += now - self.last
+        self.last = now
+
+    def window(self):
+        """The kept frames in chronological order, shape (frames, phases)."""
+        size = len(self.samples)
+        if self.frames <= size:
+            return self.samples[:self.frames]
+        return np.roll(self.samples, -(self.frames % size), axis=0)
+
+    def summary(self):
+        """Mean and p99 milliseconds per phase (and the frame total) over the window."""
+        window = self.window()
+        if not len(window):
+            return {}
+        totals = window.sum(axis=1)
+        columns = [*self.phases, "total"]
+        values = np.column_stack([window, totals]) * 1000.0
+        means = values.mean(axis=0)
+        p99s = np.percentile(values, 99, axis=0)
+        return {name: (float(mean), float(p99)) for name, mean, p99 in zip(columns, means, p99s)}
+
+    def write_csv(self, path):
+        """Write the kept frames, one row per frame in milliseconds."""
+        window = self.window() * 1000.0
+        first = self.frames - len(window)
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", *self.phases, "total"])
+            for i, row in enumerate(window):
+                writer.writerow([first + i, *(f"{value:.4f}" for value in row), f"{row.sum():.4f}"])
+
+
+def draw_profile(surface, font, summary):
+    """Render the profiler summary as a table in the top-left corner; returns its rect."""
+    rows = [("phase", "ms", "p99")]
+    rows += [(name, f"{mean:.2f}", f"{p99:.2f}") for name, (mean, p99) in summary.items()]
+    height = font.get_linesize()
+    area = pygame.draw.rect(surface, BLACK, (4, 4, 170, height * len(rows) + 8))
+    for i, (name, mean, p99) in enumerate(rows):
+        y = 8 + i * height
+        surface.blit(font.render(name, True, WHITE), (8, y))
+        # Right-align the numbers at fixed columns
+        for text, right in ((mean, 120), (p99, 168)):
+            rendered = font.render(text, True, WHITE)
+            surface.blit(rendered, (right - rendered.get_width(), y))
+    return area
+
+
+class DirtyRenderer:
+    """Pushes only the parts of the screen that changed since the last frame.
+
+    The scene is still drawn in full every frame, but instead of filling the
+    whole screen it erases only the rects drawn last frame, and instead of
+    flip() it passes display.update() each object's old rect merged with its
+    new one. Everything outside those rects is background that did not change.
+    When the changed area exceeds DIRTY_FULL_FRACTION of the screen, a single
+    full update is cheaper than many small ones.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.previous = None  # Rects drawn last frame, in draw order
+        self.full_area = surface.get_width() * surface.get_height()
+
+    def erase(self):
+        if self.previous is None or self.too_large(self.previous):
+            self.surface.fill(BLACK)
+            return
+        for rect in self.previous:
+            self.surface.fill(BLACK, rect)
+
+    def too_large(self, rects):
+        return sum(rect.width * rect.height for rect in rects) > DIRTY_FULL_FRACTION * self.full_area
+
+    def present(self, rects):
+        """Push this frame given the rects drawn into it, in draw order."""
+        previous, self.previous = self.previous, rects
+        if previous is None:
+            pygame.display.flip()
+            return
+        if len(previous) == len(rects):
+            # Same objects as last frame: one rect per object covers both positions
+            dirty = [merge_rects(old, new) for old, new in zip(previous, rects)]
+        else:
+            dirty = previous + rects
+        if self.too_large(dirty):
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+
+
+def merge_rects(first, second):
+    """Union of two rects, ignoring an empty one (e.g. an object drawn off-screen)."""
+    if not first:
+        return second
+    if not second:
+        return first
+    return first.union(second)
+
+
+def wall_geometry(hexagons):
+    """Gather the cached geometry of every wall of every hexagon into flat arrays."""
+    starts, ends, units, normals, lengths = [], [], [], [], []
+    for hexagon in hexagons:
+        idx = hexagon.wall_indices
+        starts.append(hexagon.vertices[idx])
+        ends.append(hexagon.vertices[(idx + 1) % 6])
+        units.append(hexagon.units[idx])
+        normals.append(hexagon.normals[idx])
+        lengths.append(hexagon.lengths[idx])
+    if not starts:
+        empty = np.empty((0, 2))
+        return WallGeometry(empty, empty, empty, empty, np.empty(0))
+    return WallGeometry(*(np.concatenate(part) for part in (starts, ends, units, normals, lengths)))
+
+
+def collide_walls(pos, vel, radius, walls, touched=None):
+    """Resolve all balls against all walls with batched array operations.
+
+    ``pos`` and ``vel`` are (N, 2) arrays updated in place, ``radius`` is an
+    (N,) array and ``walls`` is a WallGeometry as built by wall_geometry.
+    Walls are visited in order and each one is tested against every ball at
+    once, so every ball sees exactly the same sequence of responses as
+    calling Ball.check_wall_collision for each wall in turn. Returns the
+    number of ball-wall contacts resolved; if ``touched`` is given, an (N,)
+    boolean array, it is also set True for every ball that hit a wall.
+    """
+    hits = 0
+    if len(pos) == 0:
+        return hits
+    for start, end, wall_unit, wall_normal, wall_length in zip(*walls):
+
+        # Project every ball onto the wall and clamp to the segment
+        ball_vector = pos - start
+        projection_length = ball_vector @ wall_unit
+        closest_point = start + np.clip(projection_length, 0.0, wall_length)[:, None] * wall_unit
+        closest_point[projection_length < 0] = start
+        closest_point[projection_length > wall_length] = end
+
+        closest_to_ball = pos - closest_point
+        distance = np.hypot(closest_to_ball[:, 0], closest_to_ball[:, 1])
+        hit = distance < radius
+        if not hit.any():
+            continue
+
+        idx = np.flatnonzero(hit)
+        hits += len(idx)
+        if touched is not None:
+            touched[idx] = True
+        hit_distance = distance[idx]
+        collision_normal = np.empty((len(idx), 2))
+        touching = hit_distance == 0
+        collision_normal[touching] = wall_normal
+        moving = ~touching
+        collision_normal[moving] = closest_to_ball[idx[moving]] / hit_distance[moving, None]
+
+        # Reflect, push out of the wall, then add the rotating-wall kick
+        dot_product = np.einsum("ij,ij->i", vel[idx], collision_normal)
+        vel[idx] -= (1 + ELASTICITY) * dot_product[:, None] * collision_normal
+        pos[idx] += (radius[idx] - hit_distance)[:, None] * collision_normal
+        tangent = np.column_stack((-collision_normal[:, 1], collision_normal[:, 0]))
+        vel[idx] += tangent * WALL_KICK
+    return hits
 
 
 def create_hexagons(num_hexagons):
     hexagons = []
     max_size = min(WIDTH, HEIGHT) * 0.4
+    # Shrink by a quarter per layer, packing tighter when there are more than four
+    shrink = min(0.25, 0.75 / max(num_hexagons - 1, 1))
     
     for i in range(num_hexagons):
-        size = max_size * (1 - i * 0.25)
-        rotation_speed = random.uniform(0.2, 1.0) * (-1 if i % 2 == 0 else 1)
+        size = max_size * (1 - i * shrink)
+        rotation_speed = random.uniform(*ROTATION_SPEED_RANGE) * (-1 if i % 2 == 0 else 1)
         
         # Only the outermost hexagon has no missing wall
         missing_wall = None if i == 0 else random.randint(0, 5)
@@ -231,16 +788,197 @@ def create_balls(num_balls, innermost_hexagon):
     return balls
 
 
-def main():
+def step(hexagons, system, spatial_hash, dt=PHYSICS_DT, profiler=None):
+    """Advance the whole scene by one fixed physics step of dt seconds.
+
+    With a FrameProfiler, each phase's time is added to its current frame.
+    """
+    for hexagon in hexagons:
+        hexagon.update(dt)
+    if profiler:
+        profiler.lap("hexagons")
+    
+    # Update balls and resolve every ball against every wall in one pass
+    system.update(dt)
+    if profiler:
+        profiler.lap("integrate")
+    system.check_wall_collisions(wall_geometry(hexagons))
+    if profiler:
+        profiler.lap("walls")
+    
+    # Check for collisions with other balls in neighbouring grid cells
+    system.check_ball_collisions(*spatial_hash.pairs(system.pos))
+    if profiler:
+        profiler.lap("pairs")
+    
+    # Fallback boundary check
+    system.check_boundary_collision()
+    if profiler:
+        profiler.lap("boundary")
+    
+    system.update_sleep()
+    if profiler:
+        profiler.lap("sleep")
+
+
+def state_statistics(hexagons, system):
+    """Summarise the current state of the scene."""
+    speed = np.hypot(system.vel[:, 0], system.vel[:, 1])
+    offset = system.pos - np.asarray(CENTER, dtype=float)
+    distance = np.hypot(offset[:, 0], offset[:, 1])
+    inner_size = hexagons[-1].size if hexagons else 0.0
+    kinetic_energy = float(0.5 * np.sum(system.mass * speed ** 2))
+    # Potential energy measured from the bottom of the screen
+    potential_energy = float(np.sum(system.mass * GRAVITY * (HEIGHT - system.pos[:, 1])))
+    return {
+        "balls": len(system),
+        "mean_speed": float(speed.mean()) if len(system) else 0.0,
+        "max_speed": float(speed.max()) if len(system) else 0.0,
+        "kinetic_energy": kinetic_energy,
+        "total_energy": kinetic_energy + potential_energy,
+        "mean_distance": float(distance.mean()) if len(system) else 0.0,
+        "escaped": int(np.count_nonzero(distance > inner_size)),
+        "wall_hits": system.wall_hits,
+        "sleeping": system.sleeping_count,
+    }
+
+
+def run_headless(steps, num_balls=NUM_BALLS, num_hexagons=NUM_HEXAGONS, seed=None, dt=PHYSICS_DT,
+                 sleeping=True):
+    """Step the simulation as fast as possible with no window and no frame cap.
+
+    Returns a dict with the run's throughput and final state statistics,
+    plus ``energy_decay``: the fraction of the starting total energy lost.
+    The module-level constants are read at call time, so a caller may
+    change GRAVITY, BALL_RADIUS, etc. before calling this.
+    """
+    # No drawing happens, but route anything that touches the display to
+    # SDL's dummy driver so this runs on machines without one
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    
+    if seed is not None:
+        random.seed(seed)
+    hexagons = create_hexagons(num_hexagons)
+    system = BallSystem(create_balls(num_balls, hexagons[-1]), sleeping)
+    spatial_hash = SpatialHash(cell_size=2 * BALL_RADIUS + PAIR_MARGIN)
+    initial_energy = state_statistics(hexagons, system)["total_energy"]
+    
+    start = time.perf_counter()
+    for _ in range(steps):
+        step(hexagons, system, spatial_hash, dt)
+    elapsed = time.perf_counter() - start
+    
+    pygame.display.quit()
+    stats = {
+        "steps": steps,
+        "elapsed": elapsed,
+        "steps_per_sec": steps / elapsed if elapsed > 0 else float("inf"),
+        "candidate_pairs": spatial_hash.candidate_pairs,
+    }
+    stats.update(state_statistics(hexagons, system))
+    stats["energy_decay"] = 1 - stats["total_energy"] / initial_energy if initial_energy else 0.0
+    return stats
+
+
+def write_profile_report(profile, path, top=PROFILE_TOP):
+    """Print the functions with the most own time and save the raw stats to path."""
+    profile.dump_stats(path)
+    stats = pstats.Stats(profile).strip_dirs().sort_stats(pstats.SortKey.TIME)
+    stats.print_stats(top)
+    print(f"profile stats written to {path} (browse with: python -m pstats {path})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bouncing balls in rotating hexagons")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window or frame cap and print statistics")
+    parser.add_argument("--steps", type=int, default=1000, help="physics steps to run in headless mode")
+    parser.add_argument("--balls", type=int, default=NUM_BALLS, help="number of balls")
+    parser.add_argument("--hexagons", type=int, default=NUM_HEXAGONS, help="number of nested hexagons")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the layout and balls")
+    parser.add_argument("--no-sleep", dest="sleeping", action="store_false",
+                        help="keep integrating balls that have come to rest")
+    parser.add_argument("--no-sprites", dest="sprites", action="store_false",
+                        help="draw each ball with pygame.draw.circle instead of blitting cached sprites")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="erase and push only the changed regions instead of fill() and flip()")
+    parser.add_argument("--step-per-frame", action="store_true",
+                        help="advance exactly one physics step per frame instead of following the wall clock")
+    parser.add_argument("--phase-csv", default=None, metavar="FILE",
+                        help="on exit, write the last PROFILE_WINDOW frames' per-phase timings to FILE")
+    parser.add_argument("--profile", action="store_true",
+                        help="run --frames uncapped frames (or the --headless steps) under cProfile "
+                             "and report the hottest functions")
+    parser.add_argument("--frames", type=int, default=600,
+                        help="frames to run with --profile, one physics step each")
+    parser.add_argument("--profile-output", default="bouncing_balls.prof", metavar="FILE",
+                        help="stats file written by --profile")
+    args = parser.parse_args(argv)
+    if args.hexagons < 1:
+        parser.error("--hexagons must be at least 1")
+    if args.balls < 0 or args.steps < 0 or args.frames < 1:
+        parser.error("--balls and --steps must not be negative and --frames must be at least 1")
+    return args
+
+
+def main(argv=None):
+    launch_time = time.perf_counter()
+    args = parse_args(argv)
+    if args.headless:
+        profile = cProfile.Profile() if args.profile else None
+        if profile:
+            profile.enable()
+        stats = run_headless(args.steps, args.balls, args.hexagons, args.seed, sleeping=args.sleeping)
+        if profile:
+            profile.disable()
+            write_profile_report(profile, args.profile_output)
+        print(f"{stats['steps']} steps in {stats['elapsed']:.3f}s "
+              f"({stats['steps_per_sec']:.1f} steps/sec)")
+        for key in ("balls", "escaped", "mean_speed", "max_speed", "kinetic_energy",
+                    "energy_decay", "wall_hits", "sleeping", "mean_distance", "candidate_pairs"):
+            value = stats[key]
+            print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+        return
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    # Set up the display; only the video subsystem is used (no audio or joystick)
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Bouncing Balls in Rotating Hexagons")
+    clock = pygame.time.Clock()
+    
     # Create hexagons (from outer to inner)
-    hexagons = create_hexagons(NUM_HEXAGONS)
+    hexagons = create_hexagons(args.hexagons)
     
     # Create balls inside the innermost hexagon
-    balls = create_balls(NUM_BALLS, hexagons[-1])
+    balls = create_balls(args.balls, hexagons[-1])
+    system = BallSystem(balls, args.sleeping)
+    spatial_hash = SpatialHash()
+    renderer = DirtyRenderer(screen) if args.dirty_rects else None
+    if args.sprites:
+        sprites = BallSprites()
+        ball_images = [sprites.get(ball.color, ball.radius) for ball in balls]
+        ball_radii = np.array([ball.radius for ball in balls], dtype=int)
+    profiler = FrameProfiler()
+    overlay = None  # Font for the profiler overlay while it is shown (P toggles)
+    summary = {}
+    frame = 0
+    accumulator = 0.0
+    previous_time = time.perf_counter()
+    
+    # With --profile, run a fixed number of frames without the frame cap
+    profile = cProfile.Profile() if args.profile else None
+    if profile:
+        profile.enable()
     
     # Main game loop
     running = True
     while running:
+        profiler.begin_frame()
+        
         # Handle events
         for event in pygame.event.get():
             if event.type == QUIT:
@@ -248,40 +986,82 @@ def main():
             elif event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
                     running = False
+                elif event.key == K_p:
+                    if overlay is None:
+                        pygame.font.init()
+                        overlay = pygame.font.Font(None, 20)
+                        summary = profiler.summary()
+                    else:
+                        overlay = None
+        profiler.lap("events")
+        
+        # Advance physics in fixed steps, however long the last frame took;
+        # a profiled run does exactly one step per frame so runs compare
+        now = time.perf_counter()
+        accumulator += PHYSICS_DT if profile or args.step_per_frame else now - previous_time
+        previous_time = now
+        steps = 0
+        while accumulator >= PHYSICS_DT and steps < MAX_STEPS_PER_FRAME:
+            step(hexagons, system, spatial_hash, PHYSICS_DT, profiler)
+            accumulator -= PHYSICS_DT
+            steps += 1
+        if steps == MAX_STEPS_PER_FRAME:
+            # Too far behind: drop the backlog instead of spiralling
+            accumulator = min(accumulator, PHYSICS_DT)
+        alpha = accumulator / PHYSICS_DT
         
         # Clear the screen
-        screen.fill(BLACK)
+        if renderer:
+            renderer.erase()
+        else:
+            screen.fill(BLACK)
         
-        # Update and draw hexagons
+        # Draw hexagons and balls interpolated between the last two steps
+        drawn = []
         for hexagon in hexagons:
-            hexagon.update()
-            hexagon.draw(screen)
+            drawn.extend(hexagon.draw(screen, alpha, renderer is not None))
+        if args.sprites:
+            drawn.extend(draw_balls(screen, ball_images, system.interpolated(alpha), ball_radii))
+        else:
+            for ball, pos in zip(balls, system.interpolated(alpha)):
+                drawn.append(ball.draw(screen, pos))
+        profiler.lap("draw")
         
-        # Update and draw balls
-        for i, ball in enumerate(balls):
-            ball.update()
-            
-            # Check for collisions with walls
-            for hexagon in hexagons:
-                for wall in hexagon.get_walls():
-                    ball.check_wall_collision(wall)
-            
-            # Check for collisions with other balls
-            for j in range(i + 1, len(balls)):
-                ball.check_ball_collision(balls[j])
-            
-            # Fallback boundary check
-            ball.check_boundary_collision()
-            
-            # Draw the ball
-            ball.draw(screen)
+        if overlay is not None:
+            if frame % PROFILE_REFRESH == 0:
+                summary = profiler.summary()
+            drawn.append(draw_profile(screen, overlay, summary))
+        profiler.lap("overlay")
         
         # Update the display
-        pygame.display.flip()
+        if renderer:
+            renderer.present(drawn)
+        else:
+            pygame.display.flip()
+        profiler.lap("flip")
+        profiler.end_frame()
+        if frame == 0:
+            print(f"first frame after {(time.perf_counter() - launch_time) * 1000:.1f} ms")
+        
+        # Report broad-phase load about once a second
+        frame += 1
+        if frame % FPS == 0:
+            pygame.display.set_caption(
+                f"Bouncing Balls in Rotating Hexagons - {spatial_hash.candidate_pairs} candidate pairs, "
+                f"{system.sleeping_count} sleeping"
+            )
+        
+        if profile and frame >= args.frames:
+            running = False
         
-        # Cap the frame rate
-        clock.tick(FPS)
+        # Cap the render frame rate
+        clock.tick(0 if profile else FPS)
     
+    if profile:
+        profile.disable()
+        write_profile_report(profile, args.profile_output)
+    if args.phase_csv:
+        profiler.write_csv(args.phase_csv)
     pygame.quit()
     sys.exit()
 
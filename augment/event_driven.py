@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Event-driven engine
+-------------------
+Simulates the rotating-hexagon scene from collision to collision instead of
+in fixed steps. Between collisions every ball follows the exact solution of
+dv/dt = g - k v (gravity plus the exponential FRICTION decay), and the
+hexagons turn at constant angular speed, so positions at any time are
+evaluated directly. Each ball's next wall contact and each pair's next
+contact are predicted and kept in a heap; after a collision only the
+predictions of the balls involved are recomputed, and the stale heap
+entries are recognised by a per-ball collision counter and skipped.
+
+Ball-ball contacts are solved in closed form (gravity and friction act on
+both balls alike, so their separation moves along a straight line). Wall
+contacts against the turning segments are found by conservative
+advancement, which never steps past the first contact.
+"""
+
+import argparse
+import heapq
+import math
+import random
+import sys
+import time
+import numpy as np
+import pygame
+from pygame.locals import *
+
+import bouncing_balls
+from bouncing_balls import (
+    CENTER, WIDTH, HEIGHT, FPS, GRAVITY, FRICTION, ELASTICITY, WALL_KICK,
+    NUM_BALLS, NUM_HEXAGONS, BLACK, WHITE, create_hexagons, create_balls,
+)
+
+CONTACT_TOLERANCE = 1e-3   # px; a gap this small counts as touching
+PREDICTION_HORIZON = 0.25  # s; wall searches stop here and are re-run later
+MAX_ADVANCE_STEPS = 500    # Conservative-advancement steps per wall search
+MIN_BOUNCE_SPEED = 10.0    # px/s; slowest separation after a collision, stops endless micro-bounces
+APPROACH_SPEED = 1e-6      # px/s; slower closing speeds are treated as resting contact
+SQUEEZE_COLLISIONS = 8     # Collisions of one ball at one instant before it is resolved plastically
+
+# Second ball index of events that do not involve a pair
+WALL = -1
+REPREDICT = -2
+
+
+class EventSimulation:
+    """Event-driven simulation of balls inside nested rotating hexagons.
+
+    ``hexagons`` and ``balls`` are the objects built by create_hexagons and
+    create_balls; only their starting state is read. Ball i's motion is
+    stored as its position and velocity at time ``t0[i]``.
+    """
+
+    def __init__(self, hexagons, balls):
+        self.hexagons = hexagons
+        self.balls = balls
+        self.center = np.asarray(CENTER, dtype=float)
+        self.decay = -math.log(FRICTION)
+        self.gravity = np.array([0.0, GRAVITY])
+
+        # One entry per present wall: its hexagon and the angle of its first vertex
+        walls = [(h, side) for h, hexagon in enumerate(hexagons) for side in range(6)
+                 if side != hexagon.missing_wall]
+        self.wall_hexagon = np.array([h for h, _ in walls], dtype=np.int64)
+        side = np.array([side for _, side in walls], dtype=float)
+        self.wall_size = np.array([hexagons[h].size for h in self.wall_hexagon], dtype=float)
+        self.wall_phase = np.radians([hexagons[h].angle for h in self.wall_hexagon]) + side * math.pi / 3
+        self.wall_omega = np.radians([hexagons[h].rotation_speed for h in self.wall_hexagon])
+        # Fastest any point of any wall moves
+        self.max_omega = float(np.max(np.abs(self.wall_omega))) if walls else 0.0
+        self.max_size = float(np.max(self.wall_size)) if walls else 0.0
+        self.wall_speed = self.max_omega * self.max_size
+
+        self.p0 = np.array([ball.pos for ball in balls], dtype=float).reshape(-1, 2)
+        self.v0 = np.array([ball.vel for ball in balls], dtype=float).reshape(-1, 2)
+        self.t0 = np.zeros(len(balls))
+        self.radius = np.array([ball.radius for ball in balls], dtype=float)
+        self.mass = np.array([ball.mass for ball in balls], dtype=float)
+        self.versions = [0] * len(balls)  # Bumped whenever a ball's path changes
+        # Collisions each ball has had at the instant it last collided; a
+        # ball squeezed between a wall and other balls can otherwise bounce
+        # back and forth forever without time advancing
+        self.last_collision = [-math.inf] * len(balls)
+        self.instant_collisions = [0] * len(balls)
+
+        self.time = 0.0
+        self.queue = []
+        self._sequence = 0
+        self.events = 0       # Collisions resolved
+        self.predictions = 0  # Heap entries pushed
+        self.wall_hits = 0
+        self.ball_hits = 0
+
+        for i in range(len(balls)):
+            self._predict_walls(i)
+            self._predict_pairs(i, np.arange(i + 1, len(balls)))
+
+    # Motion -------------------------------------------------------------
+
+    def _drift(self, tau):
+        # Velocity decay e^(-k tau) and the integrals s = (1 - e) / k and
+        # q = (tau - s) / k, with their k -> 0 limits
+        if self.decay == 0:
+            return 1.0, tau, 0.5 * tau * tau
+        decay = math.exp(-self.decay * tau)
+        s = (1 - decay) / self.decay
+        return decay, s, (tau - s) / self.decay
+
+    def state(self, i, t):
+        """Position and velocity of ball i at time t."""
+        decay, s, q = self._drift(t - self.t0[i])
+        return (self.p0[i] + self.v0[i] * s + self.gravity * q,
+                self.v0[i] * decay + self.gravity * s)
+
+    def states(self, t=None):
+        """Positions and velocities of every ball at time t (default: now)."""
+        if t is None:
+            t = self.time
+        tau = t - self.t0
+        if self.decay == 0:
+            decay, s, q = np.ones_like(tau), tau, 0.5 * tau * tau
+        else:
+            decay = np.exp(-self.decay * tau)
+            s = (1 - decay) / self.decay
+            q = (tau - s) / self.decay
+        return (self.p0 + self.v0 * s[:, None] + self.gravity * q[:, None],
+                self.v0 * decay[:, None] + self.gravity * s[:, None])
+
+    def positions(self, t=None):
+        """Positions of every ball at time t (default: the current time)."""
+        return self.states(t)[0]
+
+    def hexagon_angles(self, t=None):
+        """Angle of every hexagon in degrees at time t."""
+        if t is None:
+            t = self.time
+        return [(hexagon.angle + hexagon.rotation_speed * t) % 360 for hexagon in self.hexagons]
+
+    def _rebase(self, i, t):
+        self.p0[i], self.v0[i] = self.state(i, t)
+        self.t0[i] = t
+
+    def _wall_gaps(self, position, velocity, t, radius):
+        # For every wall at time t: the gap between the ball and the wall, the
+        # rate the gap is changing at, the unit normal from the wall's
+        # closest point to the ball, that point's velocity, and whether the
+        # closest point is a vertex
+        theta = self.wall_phase + self.wall_omega * t
+        starts = self.center + self.wall_size[:, None] * np.column_stack((np.cos(theta), np.sin(theta)))
+        theta = theta + math.pi / 3
+        ends = self.center + self.wall_size[:, None] * np.column_stack((np.cos(theta), np.sin(theta)))
+        edges = ends - starts
+        along = np.einsum("ij,ij->i", position - starts, edges) / np.einsum("ij,ij->i", edges, edges)
+        at_vertex = (along <= 0) | (along >= 1)
+        closest = starts + np.clip(along, 0.0, 1.0)[:, None] * edges
+        offset = position - closest
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        normal = offset / np.maximum(distance, 1e-12)[:, None]
+        arm = closest - self.center
+        wall_velocity = self.wall_omega[:, None] * np.column_stack((-arm[:, 1], arm[:, 0]))
+        rate = np.einsum("ij,ij->i", velocity - wall_velocity, normal)
+        return distance - radius, rate, normal, wall_velocity, at_vertex
+
+    # Prediction ---------------------------------------------------------
+
+    def _push(self, t, i, j):
+        version_j = self.versions[j] if j >= 0 else 0
+        heapq.heappush(self.queue, (t, self._sequence, i, j, self.versions[i], version_j))
+        self._sequence += 1
+        self.predictions += 1
+
+    def _predict_walls(self, i):
+        # Conservative advancement. Over the horizon every gap satisfies
+        # gap(t + tau) >= gap + rate * tau - bend * tau^2 / 2, where bend
+        # bounds how fast the rate can change (gravity, friction and the
+        # turning walls, plus the curvature of the distance to a vertex), so
+        # stepping to the first root of that bound, over all walls, cannot
+        # pass a contact by more than CONTACT_TOLERANCE
+        if len(self.wall_omega) == 0:
+            return
+        t = self.time
+        end = t + PREDICTION_HORIZON
+        radius = self.radius[i]
+        position, velocity = self.state(i, t)
+        speed = np.hypot(*velocity) + GRAVITY * PREDICTION_HORIZON
+        relative_speed = speed + self.wall_speed
+        bend = (GRAVITY + self.decay * speed + 2 * self.max_omega * speed
+                + self.max_omega ** 2 * self.max_size)
+        for _ in range(MAX_ADVANCE_STEPS):
+            gap, rate, _, _, at_vertex = self._wall_gaps(position, velocity, t, radius)
+            if np.any((gap <= CONTACT_TOLERANCE) & (rate < -APPROACH_SPEED)):
+                self._push(t, i, WALL)
+                return
+            wall_bend = bend + np.where(at_vertex, relative_speed ** 2 / (gap + radius), 0.0)
+            slack = np.maximum(gap, 0.0) + CONTACT_TOLERANCE
+            tau = (rate + np.sqrt(rate * rate + 2 * wall_bend * slack)) / wall_bend
+            t += float(tau.min())
+            if t >= end:
+                break
+            position, velocity = self.state(i, t)
+        self._push(min(t, end), i, REPREDICT)
+
+    def _predict_pairs(self, i, others):
+        # Both balls of a pair feel the same gravity and friction, so their
+        # separation is d(t) = d0 + dv0 * s(t) with s = (1 - e^(-k t)) / k:
+        # a straight line in s, solved for every pair (i, j in others) at once
+        if len(others) == 0:
+            return
+        t = self.time
+        positions, velocities = self.states(t)
+        d = positions[others] - positions[i]
+        dv = velocities[others] - velocities[i]
+        reach = self.radius[others] + self.radius[i]
+        b = np.einsum("ij,ij->i", d, dv)
+        a = np.einsum("ij,ij->i", dv, dv)
+        c = np.einsum("ij,ij->i", d, d) - reach * reach
+        discriminant = b * b - a * c
+        # Approaching, and either already overlapping or on course to touch
+        hit = (b < -APPROACH_SPEED * reach) & ((c <= 0) | (discriminant >= 0))
+        if not hit.any():
+            return
+        others, a, b, c, discriminant = others[hit], a[hit], b[hit], c[hit], discriminant[hit]
+        s = np.where(c <= 0, 0.0, (-b - np.sqrt(np.maximum(discriminant, 0.0))) / a)
+        if self.decay == 0:
+            tau = s
+        else:
+            reachable = self.decay * s < 1  # Otherwise friction stops them first
+            others, s = others[reachable], s[reachable]
+            tau = -np.log1p(-self.decay * s) / self.decay
+        for j, when in zip(others.tolist(), (t + tau).tolist()):
+            self._push(when, i, j)
+
+    def _predict(self, i, exclude=None):
+        self._predict_walls(i)
+        others = np.arange(len(self.balls))
+        self._predict_pairs(i, others[(others != i) & (others != exclude)])
+
+    # Resolution ---------------------------------------------------------
+
+    def _bounce_wall(self, i, squeezed=False):
+        # Resolve every wall the ball is touching and moving into, deepest
+        # first. A squeezed ball just stops moving into the wall.
+        velocity = self.v0[i]
+        gap, rate, normal, wall_velocity, _ = self._wall_gaps(self.p0[i], velocity, self.time, self.radius[i])
+        touching = np.flatnonzero((gap <= CONTACT_TOLERANCE) & (rate < -APPROACH_SPEED))
+        if len(touching) == 0:
+            touching = [int(np.argmin(gap))]
+        for w in sorted(touching, key=lambda w: gap[w]):
+            # Reflect relative to the moving wall so the ball always leaves it
+            impact_speed = -np.dot(velocity - wall_velocity[w], normal[w])
+            if squeezed:
+                velocity += max(impact_speed, 0.0) * normal[w]
+                self.wall_hits += 1
+                continue
+            if impact_speed > 0:
+                velocity += (1 + ELASTICITY) * impact_speed * normal[w]
+            normal_speed = np.dot(velocity - wall_velocity[w], normal[w])
+            if normal_speed < MIN_BOUNCE_SPEED:
+                velocity += (MIN_BOUNCE_SPEED - normal_speed) * normal[w]
+            # Same push along the wall as the stepped engine, but only for real
+            # impacts: repeated contacts of a ball squeezed against the wall
+            # would otherwise gain WALL_KICK each time without limit
+            if impact_speed > MIN_BOUNCE_SPEED:
+                velocity += np.array([-normal[w][1], normal[w][0]]) * WALL_KICK
+            self.wall_hits += 1
+
+    def _bounce_pair(self, i, j, squeezed=False):
+        # Same impulse as Ball.check_ball_collision, at the exact contact; a
+        # squeezed pair is made to move together along the normal instead
+        elasticity = 0.5 if squeezed else ELASTICITY
+        delta = self.p0[j] - self.p0[i]
+        distance = np.hypot(*delta)
+        normal = delta / distance if distance > 0 else np.array([1.0, 0.0])
+        mi, mj = self.mass[i], self.mass[j]
+        impulse = 2 * np.dot(self.v0[j] - self.v0[i], normal) / (mi + mj)
+        self.v0[i] += impulse * mj * normal * elasticity
+        self.v0[j] -= impulse * mi * normal * elasticity
+        self.ball_hits += 1
+
+    def _count_collision(self, i):
+        # Returns True once ball i has collided too often at this instant
+        if self.last_collision[i] == self.time:
+            self.instant_collisions[i] += 1
+        else:
+            self.last_collision[i] = self.time
+            self.instant_collisions[i] = 0
+        return self.instant_collisions[i] >= SQUEEZE_COLLISIONS
+
+    def advance(self, until):
+        """Process every event up to time ``until`` and move the clock there."""
+        queue = self.queue
+        while queue and queue[0][0] <= until:
+            t, _, i, j, version_i, version_j = heapq.heappop(queue)
+            if self.versions[i] != version_i or (j >= 0 and self.versions[j] != version_j):
+                continue  # Stale: one of the balls has collided since
+            self.time = max(self.time, t)
+            if j == REPREDICT:
+                self._predict_walls(i)
+                continue
+            self.events += 1
+            self._rebase(i, self.time)
+            self.versions[i] += 1
+            squeezed = self._count_collision(i)
+            if j == WALL:
+                self._bounce_wall(i, squeezed)
+                self._predict(i)
+            else:
+                self._rebase(j, self.time)
+                self.versions[j] += 1
+                squeezed = self._count_collision(j) or squeezed
+                self._bounce_pair(i, j, squeezed)
+                self._predict(i)
+                self._predict(j, exclude=i)
+        self.time = max(self.time, until)
+
+    def statistics(self):
+        """Summarise the current state, with the same keys as state_statistics."""
+        positions, velocities = self.states()
+        speed = np.hypot(velocities[:, 0], velocities[:, 1])
+        distance = np.hypot(*(positions - self.center).T)
+        inner_size = self.hexagons[-1].size if self.hexagons else 0.0
+        return {
+            "balls": len(self.balls),
+            "mean_speed": float(speed.mean()) if len(speed) else 0.0,
+            "kinetic_energy": float(0.5 * np.sum(self.mass * speed ** 2)),
+            "escaped": int(np.count_nonzero(distance > inner_size)),
+            "wall_hits": self.wall_hits,
+            "ball_hits": self.ball_hits,
+        }
+
+
+def draw(surface, simulation):
+    """Draw the hexagons and balls at the simulation's current time."""
+    surface.fill(BLACK)
+    for hexagon, angle in zip(simulation.hexagons, simulation.hexagon_angles()):
+        vertices = []
+        for i in range(6):
+            angle_rad = math.radians(angle + i * 60)
+            vertices.append((hexagon.center[0] + hexagon.size * math.cos(angle_rad),
+                             hexagon.center[1] + hexagon.size * math.sin(angle_rad)))
+        for i in range(6):
+            if i != hexagon.missing_wall:
+                pygame.draw.line(surface, WHITE, vertices[i], vertices[(i + 1) % 6], 2)
+    for ball, pos in zip(simulation.balls, simulation.positions()):
+        ball.draw(surface, pos)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Event-driven bouncing balls in rotating hexagons")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window and compare against the stepped engine")
+    parser.add_argument("--seconds", type=float, default=10.0, help="simulated seconds in headless mode")
+    parser.add_argument("--balls", type=int, default=NUM_BALLS, help="number of balls")
+    parser.add_argument("--hexagons", type=int, default=NUM_HEXAGONS, help="number of nested hexagons")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the layout and balls")
+    args = parser.parse_args(argv)
+    if args.hexagons < 1 or args.balls < 0 or args.seconds < 0:
+        parser.error("--hexagons must be at least 1, --balls and --seconds not negative")
+    return args
+
+
+def build(num_balls, num_hexagons, seed=None):
+    # Same random draws as bouncing_balls.run_headless, so a seed gives the same scene
+    if seed is not None:
+        random.seed(seed)
+    hexagons = create_hexagons(num_hexagons)
+    return EventSimulation(hexagons, create_balls(num_balls, hexagons[-1]))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.headless:
+        simulation = build(args.balls, args.hexagons, args.seed)
+        start = time.perf_counter()
+        simulation.advance(args.seconds)
+        elapsed = time.perf_counter() - start
+        print(f"{args.seconds:.2f}s simulated in {elapsed:.3f}s: {simulation.events} collisions, "
+              f"{simulation.predictions} predictions")
+        for key, value in simulation.statistics().items():
+            print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+        steps = int(round(args.seconds / bouncing_balls.PHYSICS_DT))
+        stats = bouncing_balls.run_headless(steps, args.balls, args.hexagons, args.seed, sleeping=False)
+        print(f"stepped engine: {steps} steps in {stats['elapsed']:.3f}s, {stats['wall_hits']} wall hits")
+        return
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Bouncing Balls in Rotating Hexagons (event-driven)")
+    clock = pygame.time.Clock()
+    simulation = build(args.balls, args.hexagons, args.seed)
+    previous_time = time.perf_counter()
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                running = False
+
+        # Jump straight to the render time; collisions in between are exact
+        now = time.perf_counter()
+        simulation.advance(simulation.time + min(now - previous_time, 0.1))
+        previous_time = now
+
+        draw(screen, simulation)
+        pygame.display.flip()
+        clock.tick(FPS)
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
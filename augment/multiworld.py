@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Multi-world batched engine
+--------------------------
+Steps thousands of independent bouncing-ball scenes at once for Monte-Carlo
+studies over random hexagon layouts and ball starts. Every quantity carries a
+leading world axis: ball positions are a (K, N, 2) array, hexagon angles a
+(K, H) array and the missing walls a (K, H, 6) mask. The physics is that of
+bouncing_balls.step without sleeping, applied to all worlds with one set of
+array operations per wall and per ball pair. Every ball pair is tested here,
+while step only sees pairs within PAIR_MARGIN of touching at the start of the
+pass, so the two differ when one pass pushes a ball further than that (balls
+spawned deep inside each other); otherwise they agree up to rounding.
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+
+from bouncing_balls import (
+    CENTER, WIDTH, HEIGHT, PHYSICS_DT, GRAVITY, FRICTION, ELASTICITY, WALL_KICK,
+    ROTATION_SPEED_RANGE, BALL_RADIUS, NUM_BALLS, NUM_HEXAGONS,
+)
+
+COS30 = math.cos(math.radians(30))
+SECTOR_ANGLE = math.pi / 3
+# A ball inside a wall's sector can only touch the neighbouring wall when it
+# is within radius / sin(60 degrees) of their shared vertex
+VERTEX_REACH = 1 / math.sin(math.radians(60))
+# Unrotated vertex directions (index 6 wraps to 0) and wall-midpoint directions
+VERTEX_COS = np.cos(np.arange(7) * SECTOR_ANGLE)
+VERTEX_SIN = np.sin(np.arange(7) * SECTOR_ANGLE)
+MID_COS = np.cos((np.arange(6) + 0.5) * SECTOR_ANGLE)
+MID_SIN = np.sin((np.arange(6) + 0.5) * SECTOR_ANGLE)
+# Sector index from which side of the 0, 60 and 120 degree spokes a point
+# lies on (bits 4, 2 and 1); codes 2 and 5 cannot occur
+SECTOR_OF_SIDES = np.array([5, 4, 0, 3, 0, 0, 1, 2])
+
+
+def collide_walls(pos, vel, radius, start, end, present):
+    """Resolve balls against one wall each, in place; returns a hit mask.
+
+    Row i of ``pos``/``vel`` is tested against the wall from ``start[i]`` to
+    ``end[i]`` when ``present[i]`` is set, with the same response as
+    bouncing_balls.collide_walls.
+    """
+    wall_vector = end - start
+    wall_length = np.hypot(wall_vector[:, 0], wall_vector[:, 1])
+    wall_unit = wall_vector / wall_length[:, None]
+
+    projection_length = np.einsum("ij,ij->i", pos - start, wall_unit)
+    closest_point = start + np.clip(projection_length, 0.0, wall_length)[:, None] * wall_unit
+    beyond = projection_length > wall_length
+    closest_point[beyond] = end[beyond]
+
+    closest_to_ball = pos - closest_point
+    distance = np.hypot(closest_to_ball[:, 0], closest_to_ball[:, 1])
+    hit = (distance < radius) & present
+    if not hit.any():
+        return hit
+
+    idx = np.flatnonzero(hit)
+    hit_distance = distance[idx]
+    collision_normal = np.column_stack((wall_unit[idx, 1], -wall_unit[idx, 0]))
+    moving = hit_distance > 0
+    collision_normal[moving] = closest_to_ball[idx[moving]] / hit_distance[moving, None]
+
+    dot_product = np.einsum("ij,ij->i", vel[idx], collision_normal)
+    vel[idx] -= (1 + ELASTICITY) * dot_product[:, None] * collision_normal
+    pos[idx] += (radius - hit_distance)[:, None] * collision_normal
+    tangent = np.column_stack((-collision_normal[:, 1], collision_normal[:, 0]))
+    vel[idx] += tangent * WALL_KICK
+    return hit
+
+
+def collide_pairs(pos, vel, radius, mass, pairs):
+    """Resolve ball pairs in order for a batch of worlds, in place.
+
+    ``pos``/``vel`` are (K, N, 2) arrays; the response is the one in
+    Ball.check_ball_collision, applied at once to every world where the
+    pair touches.
+    """
+    reach = 2 * radius
+    for i, j in pairs:
+        delta_pos = pos[:, j] - pos[:, i]
+        hit = np.einsum("ki,ki->k", delta_pos, delta_pos) < reach * reach
+        if not hit.any():
+            continue
+        idx = np.flatnonzero(hit)
+        delta_pos = delta_pos[idx]
+        distance = np.hypot(delta_pos[:, 0], delta_pos[:, 1])
+        collision_vector = np.tile((1.0, 0.0), (idx.size, 1))
+        apart = distance > 0
+        collision_vector[apart] = delta_pos[apart] / distance[apart, None]
+
+        delta_vel = vel[idx, j] - vel[idx, i]
+        impulse = 2 * np.einsum("ki,ki->k", delta_vel, collision_vector) / (2 * mass)
+        kick = (impulse * mass * ELASTICITY)[:, None] * collision_vector
+        vel[idx, i] += kick
+        vel[idx, j] -= kick
+
+        overlap = ((reach - distance) / 2)[:, None] * collision_vector
+        pos[idx, i] -= overlap
+        pos[idx, j] += overlap
+
+
+class MultiWorld:
+    """K independent scenes, each with N balls and H nested hexagons.
+
+    Layouts are drawn the same way as create_hexagons/create_balls: the
+    outermost hexagon is closed, every inner one misses a random wall, and
+    balls start at random points inside the innermost hexagon.
+    """
+
+    def __init__(self, num_worlds, num_balls=NUM_BALLS, num_hexagons=NUM_HEXAGONS, seed=None):
+        rng = np.random.default_rng(seed)
+        K, N, H = num_worlds, num_balls, num_hexagons
+        self.num_worlds, self.num_balls, self.num_hexagons = K, N, H
+        self.radius = float(BALL_RADIUS)
+        self.mass = self.radius * 0.1
+        self.center = np.asarray(CENTER, dtype=float)
+
+        # Hexagons: sizes are shared, speeds and missing walls vary per world
+        max_size = min(WIDTH, HEIGHT) * 0.4
+        shrink = min(0.25, 0.75 / max(H - 1, 1))
+        self.sizes = max_size * (1 - np.arange(H) * shrink)
+        sign = np.where(np.arange(H) % 2 == 0, -1.0, 1.0)
+        self.rotation_speeds = rng.uniform(*ROTATION_SPEED_RANGE, size=(K, H)) * sign
+        self.angles = np.zeros((K, H))
+        self.walls = np.ones((K, H, 6), dtype=bool)  # False where a wall is missing
+        if H > 1:
+            missing = rng.integers(0, 6, size=(K, H - 1))
+            np.put_along_axis(self.walls[:, 1:], missing[..., None], False, axis=2)
+
+        # Balls start inside the innermost hexagon
+        angle = rng.uniform(0, 2 * math.pi, size=(K, N))
+        distance = rng.uniform(0, self.sizes[-1] * 0.8 * 0.7, size=(K, N))
+        self.pos = np.empty((K, N, 2))
+        self.pos[..., 0] = self.center[0] + distance * np.cos(angle)
+        self.pos[..., 1] = self.center[1] + distance * np.sin(angle)
+        self.vel = np.zeros((K, N, 2))
+
+        self.time = 0.0
+        self.first_escape = np.full(K, np.nan)  # Seconds until a ball first leaves the inner hexagon
+        self.wall_hits = np.zeros(K, dtype=np.int64)
+        self._pairs = [(i, j) for i in range(N) for j in range(i + 1, N)]
+
+    def step(self, dt=PHYSICS_DT):
+        """Advance every world by one physics step of dt seconds."""
+        self.angles = (self.angles + self.rotation_speeds * dt) % 360
+
+        self.vel[..., 1] += GRAVITY * dt
+        self.vel *= FRICTION ** dt
+        self.pos += self.vel * dt
+
+        self._collide_walls()
+        self._collide_balls()
+        self._collide_boundary()
+
+        self.time += dt
+        offset = self.pos - self.center
+        escaped = (np.einsum("kni,kni->kn", offset, offset) > self.sizes[-1] ** 2).any(axis=1)
+        self.first_escape[escaped & np.isnan(self.first_escape)] = self.time
+
+    def _collide_walls(self):
+        # Every point of a hexagon's walls lies between its inradius and its
+        # circumradius from the shared center, so only balls in that band
+        # (widened by the ball radius) are gathered and tested against it.
+        pos = self.pos.reshape(-1, 2)
+        vel = self.vel.reshape(-1, 2)
+        radius = self.radius
+        offset = pos - self.center
+        distance_sq = np.einsum("ij,ij->i", offset, offset)
+        for h, size in enumerate(self.sizes):
+            inner = max(size * COS30 - radius, 0.0)
+            outer = size + radius
+            near = np.flatnonzero((distance_sq >= inner * inner) & (distance_sq <= outer * outer))
+            if near.size == 0:
+                continue
+
+            # In the hexagon's rotating frame, only the wall of the ball's
+            # 60-degree sector can be hit, plus its neighbour when the ball is
+            # within reach of their shared vertex
+            offset = pos[near] - self.center
+            rotation = np.radians(self.angles[near // self.num_balls, h])
+            cos_r, sin_r = np.cos(rotation), np.sin(rotation)
+            local_x = offset[:, 0] * cos_r + offset[:, 1] * sin_r
+            local_y = offset[:, 1] * cos_r - offset[:, 0] * sin_r
+            sector = SECTOR_OF_SIDES[
+                (local_y >= 0) * 4
+                + (local_y * VERTEX_COS[1] - local_x * VERTEX_SIN[1] >= 0) * 2
+                + (local_y * VERTEX_COS[2] - local_x * VERTEX_SIN[2] >= 0)
+            ]
+            radial = local_x * MID_COS[sector] + local_y * MID_SIN[sector]
+            along = local_y * MID_COS[sector] - local_x * MID_SIN[sector]
+            corner = np.abs(along) > size / 2 - VERTEX_REACH * radius
+            # A wall is never closer than its supporting line
+            keep = np.flatnonzero(corner | (np.abs(radial - size * COS30) < radius))
+            if keep.size == 0:
+                continue
+            near, sector, corner = near[keep], sector[keep], corner[keep]
+            cos_r, sin_r, along = cos_r[keep], sin_r[keep], along[keep]
+            world = near // self.num_balls
+            near_pos = pos[near]
+            near_vel = vel[near]
+
+            # Test the candidate walls in index order, like the six-wall loop
+            neighbour = (sector + np.where(along > 0, 1, -1)) % 6
+            first = np.where(corner, np.minimum(sector, neighbour), sector)
+            second = np.maximum(sector, neighbour)
+            hits = np.zeros(near.size, dtype=np.int64)
+            for walls, active in ((first, None), (second, corner)):
+                present = self.walls[world, h, walls]
+                if active is not None:
+                    present &= active
+                if not present.any():
+                    continue
+                start = self._vertex(walls, size, cos_r, sin_r)
+                end = self._vertex(walls + 1, size, cos_r, sin_r)
+                hits += collide_walls(near_pos, near_vel, radius, start, end, present)
+
+            if hits.any():
+                pos[near] = near_pos
+                vel[near] = near_vel
+                self.wall_hits += np.bincount(world, weights=hits, minlength=self.num_worlds).astype(np.int64)
+                offset = near_pos - self.center
+                distance_sq[near] = np.einsum("ij,ij->i", offset, offset)
+
+    def _vertex(self, index, size, cos_r, sin_r):
+        # World position of vertex ``index`` of a hexagon rotated by (cos_r, sin_r)
+        x = size * VERTEX_COS[index]
+        y = size * VERTEX_SIN[index]
+        vertex = np.empty((len(index), 2))
+        vertex[:, 0] = self.center[0] + x * cos_r - y * sin_r
+        vertex[:, 1] = self.center[1] + x * sin_r + y * cos_r
+        return vertex
+
+    def _collide_balls(self):
+        collide_pairs(self.pos, self.vel, self.radius, self.mass, self._pairs)
+
+    def _collide_boundary(self):
+        pos, vel, radius = self.pos, self.vel, self.radius
+        for axis, limit in ((0, WIDTH), (1, HEIGHT)):
+            low = pos[..., axis] - radius < 0
+            high = ~low & (pos[..., axis] + radius > limit)
+            hit = low | high
+            if not hit.any():
+                continue
+            pos[..., axis][low] = radius
+            pos[..., axis][high] = limit - radius
+            vel[..., axis][hit] *= -ELASTICITY
+
+    def run(self, duration, dt=PHYSICS_DT):
+        """Step every world for ``duration`` seconds of simulated time."""
+        for _ in range(int(round(duration / dt))):
+            self.step(dt)
+        return self.summary()
+
+    def summary(self):
+        """Return per-world results as a dict of (K,) arrays."""
+        speed = np.hypot(self.vel[..., 0], self.vel[..., 1])
+        offset = self.pos - self.center
+        distance = np.hypot(offset[..., 0], offset[..., 1])
+        return {
+            "first_escape": self.first_escape.copy(),
+            "escaped": np.count_nonzero(distance > self.sizes[-1], axis=1),
+            "kinetic_energy": 0.5 * self.mass * np.sum(speed ** 2, axis=1),
+            "wall_hits": self.wall_hits.copy(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step many independent hexagon worlds at once")
+    parser.add_argument("--worlds", type=int, default=10000, help="number of independent worlds")
+    parser.add_argument("--seconds", type=float, default=5.0, help="simulated seconds per world")
+    parser.add_argument("--balls", type=int, default=NUM_BALLS, help="balls per world")
+    parser.add_argument("--hexagons", type=int, default=NUM_HEXAGONS, help="hexagons per world")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for all layouts")
+    args = parser.parse_args(argv)
+    if args.worlds < 1 or args.hexagons < 1 or args.balls < 0:
+        parser.error("--worlds and --hexagons must be at least 1 and --balls not negative")
+
+    worlds = MultiWorld(args.worlds, args.balls, args.hexagons, args.seed)
+    start = time.perf_counter()
+    summary = worlds.run(args.seconds)
+    elapsed = time.perf_counter() - start
+
+    first_escape = summary["first_escape"]
+    escaped = ~np.isnan(first_escape)
+    print(f"{args.worlds} worlds x {worlds.time:.2f}s simulated in {elapsed:.2f}s "
+          f"({args.worlds * worlds.time / elapsed:.0f} world-seconds/sec)")
+    print(f"  worlds with an escape: {escaped.sum()} ({escaped.mean():.1%})")
+    if escaped.any():
+        print(f"  first escape time: median {np.median(first_escape[escaped]):.2f}s, "
+              f"mean {first_escape[escaped].mean():.2f}s")
+    print(f"  mean kinetic energy: {summary['kinetic_energy'].mean():.1f}")
+    print(f"  mean wall hits: {summary['wall_hits'].mean():.1f}")
+
+
+if __name__ == "__main__":
+    main()
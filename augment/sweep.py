@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep runner
+----------------------
+Runs headless simulations of bouncing_balls over a grid or a random sample of
+its physics constants, spread across a process pool with one worker per core.
+Each finished run is printed as a row of one table as soon as it completes
+(and optionally appended to a CSV file), so long sweeps can be watched and
+interrupted without losing the runs already done.
+
+    python sweep.py --param GRAVITY=500,720,900 --param ELASTICITY=0.6,0.8
+    python sweep.py --samples 200 --param GRAVITY=300:1200 --param BALL_RADIUS=5:15
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+import bouncing_balls
+
+# Sweepable constants and the type each is converted to
+PARAMETERS = {
+    "GRAVITY": float,
+    "FRICTION": float,
+    "ELASTICITY": float,
+    "BALL_RADIUS": int,
+    "NUM_BALLS": int,
+    "NUM_HEXAGONS": int,
+}
+RESULT_COLUMNS = ("steps_per_sec", "energy_decay", "escaped", "wall_hits", "kinetic_energy")
+
+
+def parse_param(text):
+    """Parse NAME=v1,v2,... (a list of values) or NAME=low:high (a range).
+
+    Returns (name, spec) where spec is a list of values or a (low, high) tuple.
+    """
+    name, sep, values = text.partition("=")
+    name = name.strip().upper()
+    if not sep or name not in PARAMETERS:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=values with NAME one of {', '.join(PARAMETERS)}: {text!r}")
+    kind = PARAMETERS[name]
+    try:
+        if ":" in values:
+            low, high = (kind(part) for part in values.split(":", 1))
+            if low > high:
+                raise ValueError
+            return name, (low, high)
+        return name, [kind(part) for part in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad values for {name}: {values!r}")
+
+
+def grid(specs):
+    """Yield every combination of the listed values."""
+    names = list(specs)
+    for values in itertools.product(*(specs[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def sample(specs, count, rng):
+    """Yield count random configurations: ranges are drawn uniformly, lists by choice."""
+    for _ in range(count):
+        config = {}
+        for name, spec in specs.items():
+            if isinstance(spec, list):
+                config[name] = rng.choice(spec)
+            elif PARAMETERS[name] is int:
+                config[name] = rng.randint(*spec)
+            else:
+                config[name] = rng.uniform(*spec)
+        yield config
+
+
+def run_config(task):
+    """Worker entry point: apply one configuration and run it headless."""
+    index, config, steps, seed = task
+    for name, value in config.items():
+        setattr(bouncing_balls, name, value)
+    stats = bouncing_balls.run_headless(
+        steps,
+        num_balls=bouncing_balls.NUM_BALLS,
+        num_hexagons=bouncing_balls.NUM_HEXAGONS,
+        seed=seed,
+    )
+    return index, config, seed, stats
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the bouncing_balls physics constants")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=VALUES",
+                        help="values to sweep: a comma list (v1,v2,...) or, with --samples, a range (low:high)")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="draw this many random configurations instead of the full grid")
+    parser.add_argument("--repeats", type=int, default=1, help="runs per configuration, each with its own seed")
+    parser.add_argument("--steps", type=int, default=1000, help="physics steps per run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first repeat and of the sampler")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--csv", default=None, help="also append each finished run to this CSV file")
+    args = parser.parse_args(argv)
+    args.specs = dict(args.param)
+    if not args.specs:
+        parser.error("give at least one --param")
+    if args.samples is None and any(isinstance(spec, tuple) for spec in args.specs.values()):
+        parser.error("ranges (low:high) need --samples; use a comma list for a grid")
+    if args.repeats < 1 or args.workers < 1 or args.steps < 0:
+        parser.error("--repeats and --workers must be at least 1 and --steps not negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.samples is None:
+        configs = list(grid(args.specs))
+    else:
+        configs = list(sample(args.specs, args.samples, random.Random(args.seed)))
+    tasks = [(index, config, args.steps, args.seed + repeat)
+             for index, (config, repeat) in enumerate(itertools.product(configs, range(args.repeats)))]
+
+    names = list(args.specs)
+    header = ["run", *names, "seed", *RESULT_COLUMNS]
+    widths = [max(len(column), 10) for column in header]
+    print(f"{len(tasks)} runs of {args.steps} steps on {args.workers} workers", file=sys.stderr)
+    print("  ".join(column.rjust(width) for column, width in zip(header, widths)), flush=True)
+
+    csv_file = open(args.csv, "a", newline="") if args.csv else None
+    writer = csv.writer(csv_file) if csv_file else None
+    if writer and csv_file.tell() == 0:
+        writer.writerow(header)
+
+    start = time.perf_counter()
+    try:
+        with Pool(args.workers) as pool:
+            # Rows are printed in completion order; the run column gives the task order
+            for index, config, seed, stats in pool.imap_unordered(run_config, tasks):
+                row = [index, *(config[name] for name in names), seed,
+                       *(stats[column] for column in RESULT_COLUMNS)]
+                print("  ".join(format_value(value).rjust(width) for value, width in zip(row, widths)),
+                      flush=True)
+                if writer:
+                    writer.writerow(row)
+                    csv_file.flush()
+    finally:
+        if csv_file:
+            csv_file.close()
+    print(f"done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
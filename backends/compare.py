@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Backend comparison
+------------------
+Builds one random scene, runs it through several physics backends with the
+same fixed timestep and prints one table: steps per second (timing step()
+only) and how far each backend's ball positions drift from the reference
+backend's over the run.
+
+    python compare.py --balls 5 --steps 600 --seed 1
+    python compare.py --backends augment,pymunk --reference augment --balls 200
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from engines import BACKENDS
+from scene import random_scene
+
+COLUMNS = ("backend", "steps/s", "mean_dev", "final_dev", "max_dev", "diverge_step", "kinetic_energy")
+
+
+def run_backend(name, scene, steps, dt):
+    """Run steps of dt; returns (steps per second, positions of shape (steps, N, 2), final velocities)."""
+    backend = BACKENDS[name](scene)
+    trajectory = np.empty((steps, len(scene.balls), 2))
+    elapsed = 0.0
+    try:
+        for i in range(steps):
+            start = time.perf_counter()
+            backend.step(dt)
+            elapsed += time.perf_counter() - start
+            trajectory[i], velocities = backend.get_state()
+    finally:
+        if hasattr(backend, "close"):
+            backend.close()
+    return steps / elapsed if elapsed > 0 else float("inf"), trajectory, velocities
+
+
+def divergence(trajectory, reference, radius):
+    """Per-ball position deviation from the reference, summarised over the run.
+
+    diverge_step is the first step at which any ball is more than one ball
+    radius away from its reference position (None if it never is).
+    """
+    distances = np.hypot(*(trajectory - reference).transpose(2, 0, 1))  # (steps, N)
+    if distances.size == 0:
+        return 0.0, 0.0, 0.0, None
+    apart = np.flatnonzero((distances > radius).any(axis=1))
+    return (float(distances.mean()), float(distances[-1].mean()), float(distances.max()),
+            int(apart[0]) + 1 if apart.size else None)
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run one scene through several physics backends")
+    parser.add_argument("--balls", type=int, default=5, help="number of balls")
+    parser.add_argument("--hexagons", type=int, default=3, help="number of nested hexagons")
+    parser.add_argument("--steps", type=int, default=600, help="fixed steps per backend")
+    parser.add_argument("--hz", type=float, default=60.0, help="steps per simulated second")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the scene layout")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"comma list of backends to run (default: {','.join(BACKENDS)})")
+    parser.add_argument("--reference", default=None,
+                        help="backend the others are measured against (default: the first one)")
+    args = parser.parse_args(argv)
+    args.backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in args.backends if name not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends {', '.join(unknown)}; choose from {', '.join(BACKENDS)}")
+    if args.reference is None:
+        args.reference = args.backends[0] if args.backends else None
+    if args.reference not in args.backends:
+        parser.error("--reference must be one of --backends")
+    if args.balls < 0 or args.hexagons < 1 or args.steps < 1 or args.hz <= 0:
+        parser.error("--balls must not be negative, --hexagons and --steps at least 1 and --hz positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scene = random_scene(args.balls, args.hexagons, args.seed)
+    dt = 1.0 / args.hz
+    radius = max((ball.radius for ball in scene.balls), default=0)
+
+    # Run the reference first so the others can be compared as they finish
+    order = [args.reference] + [name for name in args.backends if name != args.reference]
+    results = {}
+    for name in order:
+        try:
+            results[name] = run_backend(name, scene, args.steps, dt)
+        except ImportError as error:
+            print(f"skipping {name}: {error}", file=sys.stderr)
+
+    if args.reference not in results:
+        print(f"reference backend {args.reference} could not run", file=sys.stderr)
+        return 1
+
+    print(f"{args.balls} balls, {args.hexagons} hexagons, {args.steps} steps of {dt * 1000:.2f} ms, "
+          f"reference {args.reference}")
+    widths = [max(len(column), 10) for column in COLUMNS]
+    print("  ".join(column.rjust(width) for column, width in zip(COLUMNS, widths)))
+    reference = results[args.reference][1]
+    for name in args.backends:
+        if name not in results:
+            continue
+        steps_per_sec, trajectory, velocities = results[name]
+        kinetic_energy = 0.5 * float((velocities ** 2).sum())
+        row = [name, steps_per_sec, *divergence(trajectory, reference, radius), kinetic_energy]
+        print("  ".join(format_value(value).rjust(width) for value, width in zip(row, widths)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Physics backends
+----------------
+Adapters that build a Scene in one of the repository's engines and drive it
+through the same interface:
+
+    backend = BACKENDS[name](scene)
+    backend.step(dt)                          # advance dt seconds
+    positions, velocities = backend.get_state()  # (N, 2) arrays, px and px/s
+
+- ``o3mini``: pure-Python float math (O3mini/simulation.py)
+- ``augment``: NumPy structure-of-arrays (augment/bouncing_balls.py)
+- ``pymunk``: Chipmunk via pymunk (FAILED[PART]copilot-claude3.5/bouncing_balls.py)
+
+Each engine keeps its own collision response, so some scene fields are only
+approximated; see the notes on each class.
+"""
+
+import importlib.util
+import math
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_modules = {}
+
+
+def load_module(folder, filename, name):
+    """Import ``folder/filename`` under a unique module name, once.
+
+    Several implementations create a window when imported, so SDL's dummy
+    video driver is selected first unless a driver was already chosen.
+    """
+    if name in _modules:
+        return _modules[name]
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    path = os.path.join(ROOT, folder, filename)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    _modules[name] = module
+    return module
+
+
+class O3miniBackend:
+    """Pure-Python engine; it integrates in per-frame units, one frame = dt.
+
+    Walls reflect perfectly (scene.elasticity is not used) and balls do not
+    collide with each other.
+    """
+
+    name = "o3mini"
+
+    def __init__(self, scene):
+        module = load_module("O3mini", "simulation.py", "o3mini_simulation")
+        self.module = module
+        self.scene = scene
+        self.hexagons = [module.Hexagon(scene.center, spec.size, 0.0, spec.missing_wall)
+                         for spec in scene.hexagons]
+        self.balls = [module.Ball((spec.x, spec.y), (spec.vx, spec.vy),
+                                  module.BALL_COLORS[i % len(module.BALL_COLORS)], spec.radius)
+                      for i, spec in enumerate(scene.balls)]
+        self.rings = module.RingIndex(self.hexagons) if self.hexagons else None
+        self.dt = None  # Frame length the velocities are currently scaled to
+
+    def _set_frame(self, dt):
+        # Convert velocities from the old frame length (or px/s) to the new one
+        scale = dt / self.dt if self.dt else dt
+        for ball in self.balls:
+            ball.vel[0] *= scale
+            ball.vel[1] *= scale
+        for hexagon, spec in zip(self.hexagons, self.scene.hexagons):
+            hexagon.rot_speed = spec.rotation_speed * dt
+        self.dt = dt
+
+    def step(self, dt):
+        if dt != self.dt:
+            self._set_frame(dt)
+        module = self.module
+        module.GRAVITY = self.scene.gravity * dt * dt
+        module.FRICTION = self.scene.friction ** dt
+        # Same order as O3mini's main loop
+        for hexagon in self.hexagons:
+            hexagon.update()
+        for ball in self.balls:
+            ball.update()
+            if self.rings is None:
+                continue
+            for hexagon in self.rings.candidates(ball):
+                for i in hexagon.edge_indices:
+                    ball.collide_with_edge(hexagon, i)
+
+    def get_state(self):
+        positions = np.array([ball.pos for ball in self.balls], dtype=float).reshape(-1, 2)
+        velocities = np.array([ball.vel for ball in self.balls], dtype=float).reshape(-1, 2)
+        if self.dt:
+            velocities /= self.dt
+        return positions, velocities
+
+
+class AugmentBackend:
+    """NumPy engine, stepped with augment's own step() function.
+
+    Keeps augment's rotating-wall push (WALL_KICK) and resting-ball sleep.
+    """
+
+    name = "augment"
+
+    def __init__(self, scene):
+        module = load_module("augment", "bouncing_balls.py", "augment_bouncing_balls")
+        self.module = module
+        self.scene = scene
+        self.hexagons = [module.Hexagon(scene.center, spec.size, spec.rotation_speed, spec.missing_wall)
+                         for spec in scene.hexagons]
+        balls = []
+        for i, spec in enumerate(scene.balls):
+            ball = module.Ball(spec.x, spec.y, spec.radius, module.BALL_COLORS[i % len(module.BALL_COLORS)])
+            ball.vel[:] = (spec.vx, spec.vy)
+            balls.append(ball)
+        self.system = module.BallSystem(balls)
+        radius = max((spec.radius for spec in scene.balls), default=module.BALL_RADIUS)
+        self.spatial_hash = module.SpatialHash(cell_size=2 * radius + module.PAIR_MARGIN)
+
+    def step(self, dt):
+        # augment reads these module constants at call time
+        module = self.module
+        module.GRAVITY = self.scene.gravity
+        module.FRICTION = self.scene.friction
+        module.ELASTICITY = self.scene.elasticity
+        module.WIDTH, module.HEIGHT = self.scene.width, self.scene.height
+        module.step(self.hexagons, self.system, self.spatial_hash, dt)
+
+    def get_state(self):
+        return self.system.pos.copy(), self.system.vel.copy()
+
+
+class PymunkBackend:
+    """Chipmunk engine. scene.friction maps onto space.damping, which has the
+    same meaning; the balls' Coulomb friction against the walls is pymunk's own.
+
+    The module keeps a single global space, so only one pymunk backend can be
+    live at a time.
+    """
+
+    name = "pymunk"
+
+    def __init__(self, scene, spatial_hash=False, iterations=10):
+        module = load_module("FAILED[PART]copilot-claude3.5", "bouncing_balls.py", "pymunk_bouncing_balls")
+        self.module = module
+        module.BALL_RADIUS = max((spec.radius for spec in scene.balls), default=module.BALL_RADIUS)
+        self.space = module.configure_space(len(scene.balls), spatial_hash, iterations)
+        self.space.gravity = (0, scene.gravity)
+        self.space.damping = scene.friction
+
+        self.hexagons = []
+        for spec in scene.hexagons:
+            # RotatingHexagon takes radians per frame of module.FPS
+            speed = math.radians(spec.rotation_speed) / module.FPS
+            hexagon = module.RotatingHexagon(scene.center, spec.size, speed, spec.missing_wall)
+            for line in hexagon.lines:
+                line.elasticity = 1.0  # pymunk multiplies both shapes' elasticities
+            self.hexagons.append(hexagon)
+
+        self.balls = []
+        for i, spec in enumerate(scene.balls):
+            module.BALL_RADIUS = spec.radius
+            ball = module.Ball((spec.x, spec.y), module.BALL_COLORS[i % len(module.BALL_COLORS)])
+            ball.body.velocity = (spec.vx, spec.vy)
+            ball.shape.elasticity = scene.elasticity
+            self.balls.append(ball)
+        self.readout = module.BodyPositions(self.balls)
+
+    def step(self, dt):
+        self.space.step(dt)
+
+    def get_state(self):
+        velocities = np.array([tuple(ball.body.velocity) for ball in self.balls], dtype=float).reshape(-1, 2)
+        return self.readout.read().copy(), velocities
+
+    def close(self):
+        self.module.clear_space()
+
+
+BACKENDS = {
+    backend.name: backend for backend in (O3miniBackend, AugmentBackend, PymunkBackend)
+}
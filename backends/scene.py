@@ -0,0 +1,49 @@
+"""
+Backend-neutral scene description
+---------------------------------
+One description of the rotating-hexagon scene that every physics backend can
+build from. All quantities are per second: positions in px, velocities in
+px/s, gravity in px/s^2, rotation speeds in degrees per second, and friction
+as the fraction of velocity kept after one second.
+"""
+
+import math
+import random
+from collections import namedtuple
+
+# size: circumradius in px; missing_wall: index 0-5 of the open side, or None
+HexagonSpec = namedtuple("HexagonSpec", ["size", "rotation_speed", "missing_wall"])
+BallSpec = namedtuple("BallSpec", ["x", "y", "vx", "vy", "radius"])
+Scene = namedtuple("Scene", ["width", "height", "center", "gravity", "friction", "elasticity",
+                             "hexagons", "balls"])
+
+
+def random_scene(num_balls=5, num_hexagons=3, seed=None, width=800, height=800,
+                 gravity=720.0, friction=0.547, elasticity=0.8, ball_radius=10,
+                 rotation_speed_range=(12.0, 60.0)):
+    """Build a scene with the same layout rules as augment/bouncing_balls.py.
+
+    Hexagons are listed outermost first; only the outermost is closed.
+    Balls start at rest inside the innermost hexagon.
+    """
+    rng = random.Random(seed)
+    center = (width / 2, height / 2)
+    max_size = min(width, height) * 0.4
+    shrink = min(0.25, 0.75 / max(num_hexagons - 1, 1))
+
+    hexagons = []
+    for i in range(num_hexagons):
+        size = max_size * (1 - i * shrink)
+        rotation_speed = rng.uniform(*rotation_speed_range) * (-1 if i % 2 == 0 else 1)
+        missing_wall = None if i == 0 else rng.randint(0, 5)
+        hexagons.append(HexagonSpec(size, rotation_speed, missing_wall))
+
+    inner_size = hexagons[-1].size * 0.8
+    balls = []
+    for _ in range(num_balls):
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(0, inner_size * 0.7)
+        balls.append(BallSpec(center[0] + distance * math.cos(angle),
+                              center[1] + distance * math.sin(angle), 0.0, 0.0, ball_radius))
+
+    return Scene(width, height, center, gravity, friction, elasticity, tuple(hexagons), tuple(balls))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Cross-implementation benchmark
+------------------------------
+Runs every implementation folder's simulation headless for a fixed number of
+frames and prints one comparison table: mean, p50 and p99 frame time, steps
+(loop iterations) per second, time to the first frame and peak RSS.
+
+Each implementation runs unmodified in its own subprocess, as ``__main__``,
+with SDL's dummy video driver and pygame.time.Clock replaced by a clock that
+never sleeps. The clock records the time between ticks and stops the run
+once enough frames have been measured, so scripts whose game loop runs at
+module level are handled the same way as those with a main() function.
+The stub's tick() returns the nominal frame length, so implementations that
+integrate by the measured dt still advance the same simulated time per frame.
+
+    python benchmark.py --frames 600
+    python benchmark.py --balls 200 --only augment,GEMINI2.5PRO,O3mini --csv results.csv
+"""
+
+import argparse
+import ast
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# How to set the ball count: a module-level constant rewritten before the
+# script runs, or command-line arguments; implementations with neither always
+# create FIXED_BALLS balls. augment's fixed-timestep loop accumulates wall-clock
+# time rather than clock.tick()'s return value, so it is told to take exactly
+# one physics step per frame.
+Implementation = namedtuple("Implementation", ["folder", "script", "ball_constant", "ball_argv"])
+FIXED_BALLS = 5
+IMPLEMENTATIONS = [
+    Implementation("augment", "bouncing_balls.py", None, ["--balls", "{balls}", "--step-per-frame"]),
+    Implementation("GEMINI2.5PRO", "bouncing_hexagons.py", "NUM_BALLS", None),
+    Implementation("O3mini", "simulation.py", "NUM_BALLS", None),
+    Implementation("claude3.5", "bouncing_balls.py", None, None),
+    Implementation("FAILED(PART)_grok3", "bouncing_balls.py", None, None),
+    Implementation("FAILED(PART)copilot-claude3.7", "bouncing_balls.py", None, None),
+    Implementation("FAILED[PART]copilot-claude3.5", "bouncing_balls.py", None, ["--balls", "{balls}"]),
+    Implementation("FAILED:GEMINI2.0", "bouncing_balls.py", "num_balls", None),
+    Implementation("FAILED:GPT4o", "simulation.py", None, None),
+    Implementation("FAILED:O1", "simulation.py", "BALL_COUNT", None),
+    Implementation("FAILED:copilot-GPT4.1", "main.py", None, None),
+    Implementation("FAILED:deepseekR1", "bounce_simulation.py", None, None),
+    Implementation("FAILED:grok3mini", "simulation.py", None, None),
+    Implementation("[FAILED]GPT4.1", "main.py", None, None),
+]
+COLUMNS = ("implementation", "balls", "frames", "mean_ms", "p50_ms", "p99_ms", "steps/s",
+           "first_frame_ms", "peak_rss_mb", "status")
+
+
+# --- Child process: run one implementation -----------------------------------
+
+class FramesDone(BaseException):
+    """Raised from the stub clock once enough frames were timed.
+
+    A BaseException so that scripts catching Exception do not swallow it.
+    """
+
+
+class FrameRecorder:
+    def __init__(self, limit):
+        self.limit = limit
+        self.start = time.perf_counter()
+        self.first_frame = None
+        self.last = None
+        self.times = []
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is None:
+            self.first_frame = now - self.start
+        else:
+            self.times.append(now - self.last)
+            if len(self.times) >= self.limit:
+                raise FramesDone
+        self.last = now
+
+
+def stub_clock(recorder):
+    """Return a pygame.time.Clock replacement that reports to recorder."""
+
+    class BenchmarkClock:
+        def __init__(self):
+            self._time = 0.0
+
+        def tick(self, framerate=0):
+            recorder.tick()
+            if framerate:
+                self._time = 1000.0 / framerate
+            elif len(recorder.times) > 0:
+                self._time = recorder.times[-1] * 1000.0
+            return int(self._time)
+
+        tick_busy_loop = tick
+
+        def get_time(self):
+            return int(self._time)
+
+        get_rawtime = get_time
+
+        def get_fps(self):
+            return 1000.0 / self._time if self._time else 0.0
+
+    return BenchmarkClock
+
+
+def compile_script(path, constants):
+    """Compile the script with the given module-level constants replaced."""
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id in constants:
+                node.value = ast.copy_location(ast.Constant(constants[target.id]), node.value)
+    return compile(tree, path, "exec")
+
+
+def run_child(args):
+    """Run one implementation in this process and write its timings as JSON."""
+    implementation = next(impl for impl in IMPLEMENTATIONS if impl.folder == args.child)
+    folder = os.path.join(ROOT, implementation.folder)
+    path = os.path.join(folder, implementation.script)
+    constants = {implementation.ball_constant: args.balls} if implementation.ball_constant else {}
+    argv = [part.format(balls=args.balls) for part in implementation.ball_argv or []]
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    recorder = FrameRecorder(args.warmup + args.frames)
+    import pygame
+    pygame.time.Clock = stub_clock(recorder)
+
+    result = {"first_frame": None, "times": [], "error": None}
+    sys.argv = [path, *argv]
+    sys.path.insert(0, folder)
+    try:
+        code = compile_script(path, constants)
+        recorder.start = time.perf_counter()
+        exec(code, {"__name__": "__main__", "__file__": path, "__builtins__": __builtins__})
+        result["error"] = f"exited after {len(recorder.times)} frames"
+    except FramesDone:
+        pass
+    except SystemExit as error:
+        result["error"] = f"exited ({error.code}) after {len(recorder.times)} frames"
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["first_frame"] = recorder.first_frame
+    result["times"] = recorder.times[args.warmup:]
+    result["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+    with open(args.result, "w") as file:
+        json.dump(result, file)
+    # Skip the script's cleanup and atexit handlers; the run is over
+    sys.stdout.flush()
+    os._exit(0)
+
+
+# --- Parent process: run every implementation and tabulate -------------------
+
+def benchmark(implementation, args):
+    """Run one implementation in a subprocess; returns one row of COLUMNS."""
+    name = implementation.folder
+    adjustable = implementation.ball_constant or implementation.ball_argv
+    balls = args.balls if adjustable else FIXED_BALLS
+    row = dict.fromkeys(COLUMNS)
+    row.update(implementation=name, balls=balls)
+    if balls != args.balls:
+        row["status"] = f"skipped: fixed at {FIXED_BALLS} balls"
+        return row
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    with tempfile.TemporaryDirectory() as directory:
+        result_path = os.path.join(directory, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--child", name, "--result", result_path,
+                   "--frames", str(args.frames), "--warmup", str(args.warmup), "--balls", str(balls),
+                   "--seed", str(args.seed)]
+        try:
+            process = subprocess.run(command, cwd=os.path.join(ROOT, name), env=env, timeout=args.timeout,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        except subprocess.TimeoutExpired:
+            row["status"] = f"timeout after {args.timeout:g}s"
+            return row
+        if not os.path.exists(result_path):
+            lines = process.stderr.strip().splitlines()
+            row["status"] = f"crashed: {lines[-1] if lines else process.returncode}"
+            return row
+        with open(result_path) as file:
+            result = json.load(file)
+
+    times = np.array(result["times"]) * 1000.0
+    row["frames"] = len(times)
+    row["status"] = result["error"] or "ok"
+    if result["first_frame"] is not None:
+        row["first_frame_ms"] = result["first_frame"] * 1000.0
+    row["peak_rss_mb"] = result["peak_rss"] / 2 ** 20
+    if len(times):
+        row["mean_ms"] = float(times.mean())
+        row["p50_ms"] = float(np.percentile(times, 50))
+        row["p99_ms"] = float(np.percentile(times, 99))
+        row["steps/s"] = 1000.0 / row["mean_ms"]
+    return row
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every implementation headless")
+    parser.add_argument("--frames", type=int, default=300, help="timed frames per implementation")
+    parser.add_argument("--warmup", type=int, default=30, help="frames run before timing starts")
+    parser.add_argument("--balls", type=int, default=FIXED_BALLS,
+                        help=f"ball count; implementations without a ball-count setting only run at {FIXED_BALLS}")
+    parser.add_argument("--seed", type=int, default=0, help="seed for random and numpy.random")
+    parser.add_argument("--only", default=None, help="comma list of implementation folders to run")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds before a run is abandoned")
+    parser.add_argument("--csv", default=None, help="also append the table to this CSV file")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.frames < 1 or args.warmup < 0 or args.balls < 0:
+        parser.error("--frames must be at least 1 and --warmup and --balls not negative")
+    folders = [impl.folder for impl in IMPLEMENTATIONS]
+    args.implementations = IMPLEMENTATIONS
+    if args.only:
+        names = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in names if name not in folders]
+        if unknown:
+            parser.error(f"unknown implementations {', '.join(unknown)}; choose from {', '.join(folders)}")
+        args.implementations = [impl for impl in IMPLEMENTATIONS if impl.folder in names]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"{args.frames} frames (+{args.warmup} warm-up) at {args.balls} balls", file=sys.stderr)
+    rows = []
+    for implementation in args.implementations:
+        print(f"  {implementation.folder} ...", file=sys.stderr, flush=True)
+        rows.append(benchmark(implementation, args))
+
+    # Fastest first; rows without timings go last
+    rows.sort(key=lambda row: -(row["steps/s"] or 0.0))
+    widths = [max(len(column), 10) for column in COLUMNS]
+    widths[0] = max(len(row["implementation"]) for row in rows + [{"implementation": COLUMNS[0]}])
+    print("  ".join(column.ljust(widths[0]) if i == 0 else column.rjust(width)
+                    for i, (column, width) in enumerate(zip(COLUMNS, widths))))
+    for row in rows:
+        values = [format_value(row[column]) for column in COLUMNS]
+        print("  ".join(value.ljust(widths[0]) if i == 0 else value.rjust(width) if i < len(COLUMNS) - 1 else value
+                        for i, (value, width) in enumerate(zip(values, widths))))
+
+    if args.csv:
+        with open(args.csv, "a", newline="") as file:
+            writer = csv.writer(file)
+            if file.tell() == 0:
+                writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow([row[column] for column in COLUMNS])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import pygame
 import numpy as np
 import math
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import random
 
 # 初始化pygame
@@ -19,6 +19,10 @@ class Config:
     BALL_RADIUS = 10
     HEXAGON_ROTATION_SPEEDS = [0.5, 1.0, 1.5]  # 每个六边形的旋转速度
     HEXAGON_SIZES = [100, 200, 300]  # 从内到外的六边形大小
+    CONTINUOUS_COLLISION = False  # 连续碰撞检测（按 C 键切换）
+    SWEEP_ITERATIONS = 32  # 每面墙求碰撞时间的最大迭代次数
+    SWEEP_TOLERANCE = 0.01  # 认为已接触的距离（像素）
+    MAX_SWEEP_BOUNCES = 4  # 每帧每个球最多处理的碰撞次数
     BALL_COLORS = [
         (255, 0, 0),    # 红
         (0, 255, 0),    # 绿
@@ -35,7 +39,7 @@ class Ball:
         self.dx = random.uniform(-5, 5)
         self.dy = random.uniform(-5, 5)
         
-    def update(self):
+    def accelerate(self):
         # 应用重力
         self.dy += Config.GRAVITY
         
@@ -43,6 +47,9 @@ class Ball:
         self.dx *= Config.FRICTION
         self.dy *= Config.FRICTION
         
+    def update(self):
+        self.accelerate()
+        
         # 更新位置
         self.x += self.dx
         self.y += self.dy
@@ -142,6 +149,103 @@ class Game:
                     ball.x += normal.x * push_distance
                     ball.y += normal.y * push_distance
     
+    def time_of_impact(self, ball: Ball, hexagon: Hexagon, wall: int, start_angle: float,
+                       t_start: float, t_end: float) -> Optional[Tuple[float, Optional[pygame.math.Vector2], Optional[pygame.math.Vector2]]]:
+        """求小球在 [t_start, t_end] 内首次接触旋转墙壁的时刻（保守推进法）
+
+        在六边形的旋转坐标系中墙壁固定不动，小球沿曲线运动；小球到这面墙的距离
+        变化速度不超过 bound，因此每次前进 距离 / bound 不会越过碰撞时刻。
+        返回 (碰撞时刻, 世界坐标系中的碰撞法线, 接触点处墙壁的速度)，确定未碰撞时返回 None。
+        迭代次数用完时无法断定不会碰撞，返回 (已推进到的时刻, None, None)，该时刻早于任何碰撞。
+        """
+        center = pygame.math.Vector2(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
+        a = pygame.math.Vector2(hexagon.size, 0).rotate(wall * 60)
+        b = pygame.math.Vector2(hexagon.size, 0).rotate((wall + 1) * 60)
+        wall_vector = b - a
+        wall_length_sq = wall_vector.length_squared()
+        
+        velocity = pygame.math.Vector2(ball.dx, ball.dy)
+        offset = pygame.math.Vector2(ball.x, ball.y) - center
+        sweep = hexagon.angle - start_angle  # 本帧转过的角度
+        omega = math.radians(sweep)
+        # 旋转只让小球沿墙面法线方向移动 |omega| 乘以最近点到中心的距离，
+        # 而墙上的点到中心不超过 size
+        bound = velocity.length() + abs(omega) * hexagon.size
+        
+        def contact(t):
+            angle = start_angle + sweep * t
+            local = (offset + velocity * (t - t_start)).rotate(-angle)
+            # 局部坐标系中线段上的最近点
+            u = max(0.0, min(1.0, (local - a).dot(wall_vector) / wall_length_sq))
+            closest = a + wall_vector * u
+            normal = local - closest
+            separation = normal.length() - Config.BALL_RADIUS
+            if normal.length_squared() == 0:
+                normal = -(a + b)
+            normal = normal.normalize().rotate(angle)
+            point = closest.rotate(angle)
+            wall_velocity = pygame.math.Vector2(-point.y, point.x) * omega
+            return separation, normal, wall_velocity
+        
+        t = t_start
+        for _ in range(Config.SWEEP_ITERATIONS):
+            separation, normal, wall_velocity = contact(t)
+            if separation <= Config.SWEEP_TOLERANCE:
+                if normal.dot(velocity - wall_velocity) < 0:
+                    return t, normal, wall_velocity
+                # 正在分离，越过接触区继续寻找
+                separation = Config.SWEEP_TOLERANCE * 2
+            
+            if bound == 0:
+                return None
+            t += separation / bound
+            if t >= t_end:
+                return None
+        return t, None, None
+    
+    def sweep_collision(self, ball: Ball, start_angles: List[float]):
+        """连续碰撞模式：沿本帧的运动轨迹依次处理最早的碰撞，防止高速小球穿墙"""
+        t = 0.0
+        for _ in range(Config.MAX_SWEEP_BOUNCES):
+            hit = None
+            for hexagon, start_angle in zip(self.hexagons, start_angles):
+                for i in range(6):
+                    if i == hexagon.missing_wall:
+                        continue
+                    result = self.time_of_impact(ball, hexagon, i, start_angle, t, hit[0] if hit else 1.0)
+                    if result is not None:
+                        hit = result
+            if hit is None:
+                break
+            
+            # 移动到碰撞时刻，相对墙壁速度做反射
+            toi, normal, wall_velocity = hit
+            ball.x += ball.dx * (toi - t)
+            ball.y += ball.dy * (toi - t)
+            t = toi
+            if normal is None:
+                # 迭代用完时返回的推进点，并未接触：从这里继续求解
+                continue
+            velocity = pygame.math.Vector2(ball.dx, ball.dy) - wall_velocity
+            reflection = velocity.reflect(normal) + wall_velocity
+            ball.dx = reflection.x
+            ball.dy = reflection.y
+            
+            # 与离散模式相同，稍微推离墙壁以防止粘着
+            ball.x += normal.x
+            ball.y += normal.y
+        else:
+            # 碰撞次数用完，本帧剩余部分改用离散检测兜底
+            ball.x += ball.dx * (1 - t)
+            ball.y += ball.dy * (1 - t)
+            for hexagon in self.hexagons:
+                self.check_collision(ball, hexagon.get_points(), hexagon.missing_wall)
+            return
+        
+        # 走完本帧剩余的时间
+        ball.x += ball.dx * (1 - t)
+        ball.y += ball.dy * (1 - t)
+    
     def run(self):
         running = True
         while running:
@@ -149,12 +253,20 @@ class Game:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                    Config.CONTINUOUS_COLLISION = not Config.CONTINUOUS_COLLISION
                     
             # 更新
+            start_angles = [hexagon.angle for hexagon in self.hexagons]
             for hexagon in self.hexagons:
                 hexagon.update()
                 
             for ball in self.balls:
+                if Config.CONTINUOUS_COLLISION:
+                    ball.accelerate()
+                    self.sweep_collision(ball, start_angles)
+                    continue
+                
                 ball.update()
                 # 检查与每个六边形的碰撞
                 for hexagon in self.hexagons: